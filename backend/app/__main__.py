@@ -0,0 +1,29 @@
+import os
+
+import uvicorn
+
+
+def _available_cpus() -> int:
+    # CPUs this process may run on, which a container's cpuset narrows;
+    # os.cpu_count() reports every core on the host
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def main():
+    # Production entrypoint: uvloop + httptools, one worker per available core by
+    # default. Each worker has its own DB pool (DB_POOL_SIZE + DB_MAX_OVERFLOW)
+    uvicorn.run(
+        "app.main:app",
+        host=os.getenv("HOST", "0.0.0.0"),
+        port=int(os.getenv("PORT", "8000")),
+        loop="uvloop",
+        http="httptools",
+        workers=int(os.getenv("WEB_CONCURRENCY", _available_cpus())),
+        log_level=os.getenv("LOG_LEVEL", "warning"),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,24 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from sqlalchemy import func, literal_column, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import raiseload
+from pydantic import TypeAdapter
 from typing import List, Optional
 from uuid import UUID
 from datetime import datetime
 
+from ..core.cache import lookup_cache
+from ..core.responses import model_response
 from ..db.base import get_db
-from ..models.database import Apartment, User, Message
+from ..models.database import Apartment
 from ..schemas.apartments import ApartmentResponse, ApartmentSearch
 
 router = APIRouter()
 
+# Built once; the endpoints below render their rows through these
+_apartment_adapter = TypeAdapter(ApartmentResponse)
+_apartments_adapter = TypeAdapter(List[ApartmentResponse])
+
 @router.get("/", response_model=List[ApartmentResponse])
 async def get_apartments(
     skip: int = Query(0, ge=0),
@@ -23,10 +32,11 @@ async def get_apartments(
     pet_friendly: Optional[bool] = Query(None),
     utilities_included: Optional[bool] = Query(None),
     availability_status: str = Query("available"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get all apartments with filtering options."""
-    query = db.query(Apartment).join(User).join(Message)
+    # ApartmentResponse exposes no relationships; raise on any accidental lazy load
+    query = select(Apartment).options(raiseload("*"))
     
     # Apply filters
     if listing_type:
@@ -51,47 +61,57 @@ async def get_apartments(
     # Order by posted date (newest first)
     query = query.order_by(Apartment.posted_date.desc())
     
-    apartments = query.offset(skip).limit(limit).all()
-    return apartments
+    apartments = (await db.execute(query.offset(skip).limit(limit))).scalars().all()
+    return model_response(_apartments_adapter, apartments)
 
 @router.get("/{apartment_id}", response_model=ApartmentResponse)
-async def get_apartment(apartment_id: UUID, db: Session = Depends(get_db)):
+async def get_apartment(apartment_id: UUID, db: AsyncSession = Depends(get_db)):
     """Get specific apartment by ID."""
-    apartment = db.query(Apartment).filter(Apartment.id == apartment_id).first()
+    # Increment view count atomically and read the row back in one round trip
+    stmt = (
+        update(Apartment)
+        .where(Apartment.id == apartment_id)
+        .values(view_count=func.coalesce(Apartment.view_count, 0) + 1)
+        .returning(Apartment)
+    )
+    apartment = (await db.execute(stmt)).scalar_one_or_none()
     if not apartment:
         raise HTTPException(status_code=404, detail="Apartment not found")
     
-    # Increment view count
-    apartment.view_count += 1
-    db.commit()
+    await db.commit()
     
-    return apartment
+    return model_response(_apartment_adapter, apartment)
 
 @router.get("/search/", response_model=List[ApartmentResponse])
 async def search_apartments(
     q: str = Query(..., min_length=1),
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Search apartments by text query."""
-    query = db.query(Apartment).filter(
+    query = select(Apartment).options(raiseload("*")).filter(
         Apartment.availability_status == "available"
     ).filter(
-        (Apartment.address.ilike(f"%{q}%")) |
-        (Apartment.listing_type.ilike(f"%{q}%"))
+        # GIN-indexed full-text match; trigram-indexed address covers substrings
+        literal_column("apartments.search_tsv").op("@@")(func.plainto_tsquery("english", q)) |
+        (Apartment.address.ilike(f"%{q}%"))
     ).order_by(Apartment.posted_date.desc())
     
-    apartments = query.offset(skip).limit(limit).all()
-    return apartments
+    apartments = (await db.execute(query.offset(skip).limit(limit))).scalars().all()
+    return model_response(_apartments_adapter, apartments)
 
 @router.get("/filters/")
-async def get_available_filters(db: Session = Depends(get_db)):
+async def get_available_filters(db: AsyncSession = Depends(get_db)):
     """Get available filter options."""
-    listing_types = db.query(Apartment.listing_type).distinct().all()
+    async def load_listing_types():
+        rows = await db.execute(select(Apartment.listing_type).distinct())
+        return [lt[0] for lt in rows if lt[0]]
+
+    listing_types = await lookup_cache.get_or_set("apartment_listing_types", load_listing_types)
     
     return {
-        "listing_types": [lt[0] for lt in listing_types if lt[0]],
+        "listing_types": listing_types,
         "price_ranges": [
             {"label": "Under $500", "min": 0, "max": 500},
             {"label": "$500-$1000", "min": 500, "max": 1000},
@@ -103,14 +123,17 @@ async def get_available_filters(db: Session = Depends(get_db)):
     }
 
 @router.post("/{apartment_id}/inquire")
-async def inquire_about_apartment(apartment_id: UUID, db: Session = Depends(get_db)):
+async def inquire_about_apartment(apartment_id: UUID, db: AsyncSession = Depends(get_db)):
     """Track inquiry about an apartment."""
-    apartment = db.query(Apartment).filter(Apartment.id == apartment_id).first()
-    if not apartment:
+    result = await db.execute(
+        update(Apartment)
+        .where(Apartment.id == apartment_id)
+        .values(inquiry_count=func.coalesce(Apartment.inquiry_count, 0) + 1)
+    )
+    if not result.rowcount:
         raise HTTPException(status_code=404, detail="Apartment not found")
     
-    apartment.inquiry_count += 1
-    db.commit()
+    await db.commit()
     
     return {"message": "Inquiry recorded"}
 
@@ -118,14 +141,14 @@ async def inquire_about_apartment(apartment_id: UUID, db: Session = Depends(get_
 async def update_apartment_status(
     apartment_id: UUID,
     status: str = Query(..., regex="^(available|rented|pending)$"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update apartment availability status."""
-    apartment = db.query(Apartment).filter(Apartment.id == apartment_id).first()
+    apartment = await db.get(Apartment, apartment_id)
     if not apartment:
         raise HTTPException(status_code=404, detail="Apartment not found")
     
     apartment.availability_status = status
-    db.commit()
+    await db.commit()
     
     return {"message": "Status updated successfully", "status": status}
\ No newline at end of file
@@ -1,5 +1,6 @@
 from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
+from sqlalchemy import func, literal_column, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 from datetime import datetime
 
@@ -13,50 +14,59 @@ async def most_recent_items(
     limit: int = Query(10, ge=1, le=50),
     after: Optional[datetime] = Query(None),
     q: Optional[str] = Query(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
-    # Join with users, messages, and groups to get complete info
-    query = db.query(ItemForSale, User, Message, Group).join(
+    # Select only the columns the response needs; skips ORM hydration entirely
+    query = select(
+        ItemForSale.title,
+        ItemForSale.price,
+        ItemForSale.category,
+        ItemForSale.posted_date,
+        literal_column("items_for_sale.contact_raw").label("contact_raw"),
+        ItemForSale.location,
+        ItemForSale.item_id,
+        User.display_name,
+        User.phone_number,
+        Group.group_name,
+        Message.message_id,
+        Message.content,
+        Message.timestamp,
+    ).join(
         User, ItemForSale.user_id == User.id
     ).join(
         Message, ItemForSale.message_id == Message.id
     ).join(
         Group, Message.group_id == Group.id
-    ).filter(ItemForSale.availability_status == "available")
+    ).where(ItemForSale.availability_status == "available")
     
     if after:
-        query = query.filter(ItemForSale.posted_date > after)
+        query = query.where(ItemForSale.posted_date > after)
     if q:
-        query = query.filter(
-            (ItemForSale.title.ilike(f"%{q}%")) | 
-            (ItemForSale.description.ilike(f"%{q}%")) |
+        query = query.where(
+            literal_column("items_for_sale.search_tsv").op("@@")(func.plainto_tsquery("english", q)) |
+            (ItemForSale.title.ilike(f"%{q}%")) |
             (User.display_name.ilike(f"%{q}%")) |
             (Group.group_name.ilike(f"%{q}%"))
         )
     
-    rows = query.order_by(ItemForSale.posted_date.desc()).limit(limit).all()
-    
-    def contact(info):
-        if not info:
-            return None
-        return info.get("raw") if isinstance(info, dict) else str(info)
+    rows = (await db.execute(query.order_by(ItemForSale.posted_date.desc()).limit(limit))).all()
     
     return [
         {
-            "title": r[0].title,
-            "price": float(r[0].price) if r[0].price is not None else None,
-            "category": r[0].category,
-            "posted_date": r[0].posted_date,
-            "contact": contact(r[0].contact_info),
-            "location": r[0].location,
-            "item_id": r[0].item_id,
+            "title": r.title,
+            "price": float(r.price) if r.price is not None else None,
+            "category": r.category,
+            "posted_date": r.posted_date,
+            "contact": r.contact_raw,
+            "location": r.location,
+            "item_id": r.item_id,
             # New fields for seller and group info
-            "seller_name": r[1].display_name if r[1] else "Unknown",
-            "seller_phone": r[1].phone_number if r[1] else None,
-            "group_name": r[3].group_name if r[3] else "Unknown",
-            "message_id": r[2].message_id if r[2] else None,
-            "original_message": r[2].content if r[2] else None,
-            "message_timestamp": r[2].timestamp if r[2] else None,
+            "seller_name": r.display_name,
+            "seller_phone": r.phone_number,
+            "group_name": r.group_name,
+            "message_id": r.message_id,
+            "original_message": r.content,
+            "message_timestamp": r.timestamp,
         }
         for r in rows
     ]
@@ -66,49 +76,57 @@ async def most_recent_apartments(
     limit: int = Query(10, ge=1, le=50),
     after: Optional[datetime] = Query(None),
     q: Optional[str] = Query(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
-    # Join with users, messages, and groups to get complete info
-    query = db.query(Apartment, User, Message, Group).join(
+    # Select only the columns the response needs; skips ORM hydration entirely
+    query = select(
+        Apartment.listing_type,
+        Apartment.address,
+        Apartment.price_per_month,
+        Apartment.posted_date,
+        literal_column("apartments.contact_raw").label("contact_raw"),
+        Apartment.listing_id,
+        User.display_name,
+        User.phone_number,
+        Group.group_name,
+        Message.message_id,
+        Message.content,
+        Message.timestamp,
+    ).join(
         User, Apartment.user_id == User.id
     ).join(
         Message, Apartment.message_id == Message.id
     ).join(
         Group, Message.group_id == Group.id
-    ).filter(Apartment.availability_status == "available")
+    ).where(Apartment.availability_status == "available")
     
     if after:
-        query = query.filter(Apartment.posted_date > after)
+        query = query.where(Apartment.posted_date > after)
     if q:
-        query = query.filter(
-            (Apartment.address.ilike(f"%{q}%")) | 
-            (Apartment.listing_type.ilike(f"%{q}%")) |
+        query = query.where(
+            literal_column("apartments.search_tsv").op("@@")(func.plainto_tsquery("english", q)) |
+            (Apartment.address.ilike(f"%{q}%")) |
             (User.display_name.ilike(f"%{q}%")) |
             (Group.group_name.ilike(f"%{q}%"))
         )
     
-    rows = query.order_by(Apartment.posted_date.desc()).limit(limit).all()
-    
-    def contact(info):
-        if not info:
-            return None
-        return info.get("raw") if isinstance(info, dict) else str(info)
+    rows = (await db.execute(query.order_by(Apartment.posted_date.desc()).limit(limit))).all()
     
     return [
         {
-            "listing_type": r[0].listing_type,
-            "address": r[0].address,
-            "price_per_month": float(r[0].price_per_month) if r[0].price_per_month is not None else None,
-            "posted_date": r[0].posted_date,
-            "contact": contact(r[0].contact_info),
-            "listing_id": r[0].listing_id,
+            "listing_type": r.listing_type,
+            "address": r.address,
+            "price_per_month": float(r.price_per_month) if r.price_per_month is not None else None,
+            "posted_date": r.posted_date,
+            "contact": r.contact_raw,
+            "listing_id": r.listing_id,
             # New fields for seller and group info
-            "seller_name": r[1].display_name if r[1] else "Unknown",
-            "seller_phone": r[1].phone_number if r[1] else None,
-            "group_name": r[3].group_name if r[3] else "Unknown",
-            "message_id": r[2].message_id if r[2] else None,
-            "original_message": r[2].content if r[2] else None,
-            "message_timestamp": r[2].timestamp if r[2] else None,
+            "seller_name": r.display_name,
+            "seller_phone": r.phone_number,
+            "group_name": r.group_name,
+            "message_id": r.message_id,
+            "original_message": r.content,
+            "message_timestamp": r.timestamp,
         }
         for r in rows
     ]
\ No newline at end of file
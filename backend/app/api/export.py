@@ -1,131 +1,181 @@
 from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
-from typing import Optional, List
+from fastapi.responses import StreamingResponse
+from sqlalchemy import literal_column, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
 from datetime import datetime
 
-from ..db.base import get_db
+from ..core.responses import ORJSONResponse
+from ..db.base import AsyncSessionLocal, get_db
 from ..models.database import ItemForSale, Apartment, User, Message, Group
 
 router = APIRouter()
 
+# Rows fetched per server-side cursor round trip when streaming text exports
+_TEXT_EXPORT_CHUNK = 200
 
-def _contact_str(info) -> Optional[str]:
-    if not info:
-        return None
-    if isinstance(info, dict):
-        return info.get("raw") or None
-    return str(info)
+# Line templates for the text exports, bound once instead of re-parsed per row
+_APARTMENT_LINE = "[{}] {}: {} - ${} | Contact: {}\n".format
+_ITEM_LINE = "[{}] {} - ${} ({}) | Contact: {}\n".format
 
 
-@router.get("/items/json")
+# Generated column holding contact_info->>'raw'
+_ITEM_CONTACT = literal_column("items_for_sale.contact_raw").label("contact_raw")
+_APARTMENT_CONTACT = literal_column("apartments.contact_raw").label("contact_raw")
+
+
+@router.get("/items/json", response_class=ORJSONResponse)
 async def export_items_json(
     after: Optional[datetime] = Query(None),
     limit: int = Query(200, ge=1, le=2000),
-    db: Session = Depends(get_db),
 ):
-    # Join with users, messages, and groups to get complete info
-    q = db.query(ItemForSale, User, Message, Group).join(
+    # Select only the columns the response needs; skips ORM hydration entirely
+    q = select(
+        ItemForSale.title,
+        ItemForSale.description,
+        ItemForSale.price,
+        ItemForSale.category,
+        ItemForSale.condition,
+        ItemForSale.location,
+        ItemForSale.posted_date,
+        _ITEM_CONTACT,
+        ItemForSale.item_id,
+        User.display_name,
+        User.phone_number,
+        Group.group_name,
+        Message.message_id,
+        Message.content,
+        Message.timestamp,
+    ).join(
         User, ItemForSale.user_id == User.id
     ).join(
         Message, ItemForSale.message_id == Message.id
     ).join(
         Group, Message.group_id == Group.id
-    ).filter(ItemForSale.availability_status == "available")
+    ).where(ItemForSale.availability_status == "available")
     
     if after:
-        q = q.filter(ItemForSale.posted_date > after)
+        q = q.where(ItemForSale.posted_date > after)
     
-    rows = q.order_by(ItemForSale.posted_date.desc()).limit(limit).all()
-    return [
+    # Hold the connection only for the query, not while the response is serialized
+    async with AsyncSessionLocal() as db:
+        rows = (await db.execute(q.order_by(ItemForSale.posted_date.desc()).limit(limit))).all()
+    # Returned directly so the rows skip jsonable_encoder; orjson handles datetimes natively
+    return ORJSONResponse([
         {
             "category": "item_for_sale",
-            "title": r[0].title,
-            "description": r[0].description,
-            "price": float(r[0].price) if r[0].price is not None else None,
-            "item_category": r[0].category,
-            "condition": r[0].condition,
-            "location": r[0].location,
-            "posted_date": r[0].posted_date,
-            "contact": _contact_str(r[0].contact_info),
-            "item_id": r[0].item_id,
+            "title": r.title,
+            "description": r.description,
+            "price": float(r.price) if r.price is not None else None,
+            "item_category": r.category,
+            "condition": r.condition,
+            "location": r.location,
+            "posted_date": r.posted_date,
+            "contact": r.contact_raw,
+            "item_id": r.item_id,
             # New fields for seller and group info
-            "seller_name": r[1].display_name if r[1] else "Unknown",
-            "seller_phone": r[1].phone_number if r[1] else None,
-            "group_name": r[3].group_name if r[3] else "Unknown",
-            "message_id": r[2].message_id if r[2] else None,
-            "original_message": r[2].content if r[2] else None,
-            "message_timestamp": r[2].timestamp if r[2] else None,
+            "seller_name": r.display_name,
+            "seller_phone": r.phone_number,
+            "group_name": r.group_name,
+            "message_id": r.message_id,
+            "original_message": r.content,
+            "message_timestamp": r.timestamp,
         }
         for r in rows
-    ]
+    ])
 
 
-@router.get("/apartments/json")
+@router.get("/apartments/json", response_class=ORJSONResponse)
 async def export_apartments_json(
     after: Optional[datetime] = Query(None),
     listing_type: Optional[str] = Query(None),
     limit: int = Query(200, ge=1, le=2000),
-    db: Session = Depends(get_db),
 ):
-    # Join with users, messages, and groups to get complete info
-    q = db.query(Apartment, User, Message, Group).join(
+    # Select only the columns the response needs; skips ORM hydration entirely
+    q = select(
+        Apartment.listing_type,
+        Apartment.address,
+        Apartment.price_per_month,
+        Apartment.bedrooms,
+        Apartment.bathrooms,
+        Apartment.lease_duration,
+        Apartment.posted_date,
+        _APARTMENT_CONTACT,
+        Apartment.listing_id,
+        User.display_name,
+        User.phone_number,
+        Group.group_name,
+        Message.message_id,
+        Message.content,
+        Message.timestamp,
+    ).join(
         User, Apartment.user_id == User.id
     ).join(
         Message, Apartment.message_id == Message.id
     ).join(
         Group, Message.group_id == Group.id
-    ).filter(Apartment.availability_status == "available")
+    ).where(Apartment.availability_status == "available")
     
     if after:
-        q = q.filter(Apartment.posted_date > after)
+        q = q.where(Apartment.posted_date > after)
     if listing_type:
-        q = q.filter(Apartment.listing_type == listing_type)
+        q = q.where(Apartment.listing_type == listing_type)
     
-    rows = q.order_by(Apartment.posted_date.desc()).limit(limit).all()
-    return [
+    # Hold the connection only for the query, not while the response is serialized
+    async with AsyncSessionLocal() as db:
+        rows = (await db.execute(q.order_by(Apartment.posted_date.desc()).limit(limit))).all()
+    return ORJSONResponse([
         {
-            "category": r[0].listing_type,
-            "address": r[0].address,
-            "price_per_month": float(r[0].price_per_month) if r[0].price_per_month is not None else None,
-            "bedrooms": r[0].bedrooms,
-            "bathrooms": r[0].bathrooms,
-            "lease_duration": r[0].lease_duration,
-            "posted_date": r[0].posted_date,
-            "contact": _contact_str(r[0].contact_info),
-            "listing_id": r[0].listing_id,
+            "category": r.listing_type,
+            "address": r.address,
+            "price_per_month": float(r.price_per_month) if r.price_per_month is not None else None,
+            "bedrooms": r.bedrooms,
+            "bathrooms": r.bathrooms,
+            "lease_duration": r.lease_duration,
+            "posted_date": r.posted_date,
+            "contact": r.contact_raw,
+            "listing_id": r.listing_id,
             # New fields for seller and group info
-            "seller_name": r[1].display_name if r[1] else "Unknown",
-            "seller_phone": r[1].phone_number if r[1] else None,
-            "group_name": r[3].group_name if r[3] else "Unknown",
-            "message_id": r[2].message_id if r[2] else None,
-            "original_message": r[2].content if r[2] else None,
-            "message_timestamp": r[2].timestamp if r[2] else None,
+            "seller_name": r.display_name,
+            "seller_phone": r.phone_number,
+            "group_name": r.group_name,
+            "message_id": r.message_id,
+            "original_message": r.content,
+            "message_timestamp": r.timestamp,
         }
         for r in rows
-    ]
+    ])
 
 
-@router.get("/messages/json")
+@router.get("/messages/json", response_class=ORJSONResponse)
 async def export_messages_json(
     after: Optional[datetime] = Query(None),
     limit: int = Query(500, ge=1, le=5000),
-    db: Session = Depends(get_db),
 ):
-    q = db.query(Message)
+    q = select(
+        Message.message_id,
+        Message.timestamp,
+        Message.content,
+        Message.links,
+        Message.user_id,
+        Message.group_id,
+    )
     if after:
-        q = q.filter(Message.timestamp > after)
-    rows: List[Message] = q.order_by(Message.timestamp.desc()).limit(limit).all()
-    return [
+        q = q.where(Message.timestamp > after)
+    # Hold the connection only for the query, not while the response is serialized
+    async with AsyncSessionLocal() as db:
+        rows = (await db.execute(q.order_by(Message.timestamp.desc()).limit(limit))).all()
+    return ORJSONResponse([
         {
             "message_id": r.message_id,
             "timestamp": r.timestamp,
             "content": r.content,
             "links": r.links,
-            "user_id": str(r.user_id) if r.user_id else None,
-            "group_id": str(r.group_id) if r.group_id else None,
+            "user_id": r.user_id,
+            "group_id": r.group_id,
         }
         for r in rows
-    ]
+    ])
 
 
 @router.get("/apartments/text")
@@ -133,33 +183,61 @@ async def export_apartments_text(
     listing_type: Optional[str] = Query(None),
     after: Optional[datetime] = Query(None),
     limit: int = Query(50, ge=1, le=500),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
-    q = db.query(Apartment).filter(Apartment.availability_status == "available")
+    q = select(
+        Apartment.posted_date,
+        Apartment.listing_type,
+        Apartment.address,
+        Apartment.price_per_month,
+        _APARTMENT_CONTACT,
+    ).where(Apartment.availability_status == "available")
     if listing_type:
-        q = q.filter(Apartment.listing_type == listing_type)
+        q = q.where(Apartment.listing_type == listing_type)
     if after:
-        q = q.filter(Apartment.posted_date > after)
-    rows: List[Apartment] = q.order_by(Apartment.posted_date.desc()).limit(limit).all()
-    lines: List[str] = []
-    for r in rows:
-        line = f"[{r.posted_date:%Y-%m-%d}] {r.listing_type.upper()}: {r.address or 'N/A'} - ${float(r.price_per_month) if r.price_per_month else 'N/A'} | Contact: {_contact_str(r.contact_info) or 'N/A'}"
-        lines.append(line)
-    return {"text": "\n".join(lines)}
+        q = q.where(Apartment.posted_date > after)
+    q = q.order_by(Apartment.posted_date.desc()).limit(limit)
+
+    async def lines():
+        async for r in await db.stream(q.execution_options(yield_per=_TEXT_EXPORT_CHUNK)):
+            price = r.price_per_month
+            yield _APARTMENT_LINE(
+                r.posted_date.date().isoformat(),
+                r.listing_type.upper(),
+                r.address or "N/A",
+                float(price) if price else "N/A",
+                r.contact_raw or "N/A",
+            )
+
+    return StreamingResponse(lines(), media_type="text/plain")
 
 
 @router.get("/items/text")
 async def export_items_text(
     after: Optional[datetime] = Query(None),
     limit: int = Query(50, ge=1, le=500),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
-    q = db.query(ItemForSale).filter(ItemForSale.availability_status == "available")
+    q = select(
+        ItemForSale.posted_date,
+        ItemForSale.title,
+        ItemForSale.price,
+        ItemForSale.category,
+        _ITEM_CONTACT,
+    ).where(ItemForSale.availability_status == "available")
     if after:
-        q = q.filter(ItemForSale.posted_date > after)
-    rows: List[ItemForSale] = q.order_by(ItemForSale.posted_date.desc()).limit(limit).all()
-    lines: List[str] = []
-    for r in rows:
-        line = f"[{r.posted_date:%Y-%m-%d}] {r.title} - ${float(r.price) if r.price else 'N/A'} ({r.category}) | Contact: {_contact_str(r.contact_info) or 'N/A'}"
-        lines.append(line)
-    return {"text": "\n".join(lines)}
+        q = q.where(ItemForSale.posted_date > after)
+    q = q.order_by(ItemForSale.posted_date.desc()).limit(limit)
+
+    async def lines():
+        async for r in await db.stream(q.execution_options(yield_per=_TEXT_EXPORT_CHUNK)):
+            price = r.price
+            yield _ITEM_LINE(
+                r.posted_date.date().isoformat(),
+                r.title,
+                float(price) if price else "N/A",
+                r.category,
+                r.contact_raw or "N/A",
+            )
+
+    return StreamingResponse(lines(), media_type="text/plain")
@@ -1,9 +1,15 @@
 from fastapi import APIRouter, Depends, UploadFile, File, Query, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import String, any_, bindparam, case, func, literal, literal_column, or_, select
+from sqlalchemy.dialects.postgresql import ARRAY, insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 from datetime import datetime, timezone
+import functools
+import io
+import uuid
 from ..db.base import get_db
-from ..services.chat_ingest import ChatIngestService
+from ..models.database import User, Group, Message, CanonicalMessage
+from ..services.chat_export_parser import parse_chat_export, compute_content_hash, _extract_links
 
 router = APIRouter()
 
@@ -11,11 +17,8 @@ router = APIRouter()
 async def ingest_chat_export(
     file: UploadFile = File(..., description="attach a `.txt` export from WhatsApp"),
     since: Optional[str] = Query(None, description="Only ingest messages strictly after this UTC timestamp. Format: `YYYY-MM-DDTHH:MM:SS` or `YYYY-MM-DD`"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
-    contents = await file.read()
-    text = contents.decode("utf-8", errors="replace")
-    
     # Parse the since parameter properly
     since_dt = None
     if since:
@@ -29,146 +32,181 @@ async def ingest_chat_export(
         except ValueError:
             raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD or YYYY-MM-DDTHH:MM:SS")
     
-    # Fix import path - use relative import
-    from ..services.chat_export_parser import parse_chat_export, compute_content_hash
-    
     # Parse with since filter - filtering happens in parser now
+    # Decode the spooled upload incrementally instead of reading, decoding and
+    # splitting the whole file in memory. newline="" keeps line endings as sent,
+    # so CRLF exports hash to the same message ids as before
+    lines = io.TextIOWrapper(file.file, encoding="utf-8", errors="replace", newline="")
     try:
-        parsed = parse_chat_export(iter(text.splitlines(True)), since=since_dt)
+        parsed = parse_chat_export(lines, since=since_dt)
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Failed to parse export: {e}")
+    finally:
+        # Leave the underlying upload file for UploadFile to close
+        lines.detach()
     
-    service = ChatIngestService(db)
     inserted = 0
     skipped = 0
     seen_in_batch = set()
-    seen_canonical_in_batch = set()  # Track canonical content hashes in this batch
-    seen_group_content_in_batch = set()  # Track (group_id, content_hash) combinations in this batch
-    
-    from ..models.database import User, Group, Message, CanonicalMessage
+    seen_hashes_in_batch = set()  # Track content hashes in this batch; an export is a single group
     
     group_name = parsed["group_name"]
-    group = db.query(Group).filter(Group.group_name == group_name).first()
+    group = (await db.execute(select(Group).where(Group.group_name == group_name))).scalars().first()
     if not group:
-        from datetime import datetime as dt
         group = Group(
             group_id=f"export::{group_name}",
             group_name=group_name,
             university="[UNK]",
             category="general",
             member_count=0,
-            last_scraped=dt.utcnow(),
+            last_scraped=datetime.utcnow(),
         )
         db.add(group)
-        db.flush()
+        await db.flush()
     
+    # Prefetch everything the loop needs in a handful of queries instead of
+    # probing the DB once (or several times) per message.
+    messages = parsed["messages"]
+    mids = [m["message_id"] for m in messages]
+    # Forwarded messages repeat the same body many times; hash each distinct body once
+    content_hash_of = functools.cache(compute_content_hash)
+    hashes = [content_hash_of(m["body"]) for m in messages]
+    phones = {m["sender_phone"] for m in messages if m.get("sender_phone")}
+    names = {m["sender_name"] for m in messages}
+
+    # Only this upload's ids are probed, so the set is bounded by the batch size.
+    # Send them as one array parameter; an expanded IN list runs into the
+    # driver's bind-parameter limit on very large exports.
+    existing_mids = set(
+        (await db.execute(
+            select(Message.message_id).where(
+                Message.message_id == any_(bindparam("mids", mids, type_=ARRAY(String)))
+            )
+        )).scalars()
+    )
+    user_by_phone = {}
+    user_by_name = {}
+    users = await db.execute(
+        select(User).where(or_(User.phone_number.in_(phones), User.display_name.in_(names)))
+    )
+    for u in users.scalars():
+        if u.phone_number:
+            user_by_phone.setdefault(u.phone_number, u)
+        user_by_name.setdefault(u.display_name, u)
+
+    new_users = []
+    message_rows = []
+
     # Remove duplicate since filtering - it's now done in parser
-    for msg in parsed["messages"]:
+    for msg, content_hash in zip(messages, hashes):
         ts = msg["timestamp"]
         mid = msg["message_id"]
         
         # Skip if we've already seen this message_id in this same upload batch
-        if mid in seen_in_batch:
-            skipped += 1
-            continue
-            
-        exists = db.query(Message).filter(Message.message_id == mid).first()
-        if exists:
+        if mid in seen_in_batch or mid in existing_mids:
             skipped += 1
             continue
         
         user = None
         if msg.get("sender_phone"):
-            user = db.query(User).filter(User.phone_number == msg["sender_phone"]).first()
+            user = user_by_phone.get(msg["sender_phone"])
         if not user:
-            user = db.query(User).filter(User.display_name == msg["sender_name"]).first()
+            user = user_by_name.get(msg["sender_name"])
         if not user:
             user = User(
+                id=uuid.uuid4(),
                 unique_id=f"export_user::{msg.get('sender_phone') or msg['sender_name']}",
                 phone_number=msg.get("sender_phone"),
                 display_name=msg["sender_name"],
             )
-            db.add(user)
-            db.flush()
-        
-        # Compute dedup content hash per group
-        content_hash = compute_content_hash(msg["body"])
-        group_content_key = (group.id, content_hash)
+            new_users.append(user)
+            if user.phone_number:
+                user_by_phone[user.phone_number] = user
+            user_by_name.setdefault(user.display_name, user)
         
-        # Check if we've already seen this (group_id, content_hash) in this batch
-        if group_content_key in seen_group_content_in_batch:
-            skipped += 1
-            continue
-            
-        # Check if this (group_id, content_hash) already exists in DB
-        dup = db.query(Message).filter(
-            Message.group_id == group.id,
-            Message.content_hash == content_hash,
-        ).first()
-        if dup:
-            # Update occurrence metadata
-            from datetime import datetime as dt
-            dup.last_seen = ts or dt.utcnow()
-            dup.occurrence_count = (dup.occurrence_count or 1) + 1
+        # Dedup content hash per group. An export is one group, so the hash alone
+        # identifies its (group_id, content_hash) key; duplicates of rows already
+        # in the DB are resolved by the upsert below
+        if content_hash in seen_hashes_in_batch:
             skipped += 1
             continue
 
-        record = Message(
-            message_id=mid,
-            user_id=user.id,
-            group_id=group.id,
-            content=msg["body"],
-            timestamp=ts,
-            message_type="text",
-            reactions=None,
-            links=msg.get("links", []),
-            has_media=False,
-            media_info=None,
-            processed=False,
-            content_hash=content_hash,
-            first_seen=ts,
-            last_seen=ts,
-            occurrence_count=1,
-        )
-        db.add(record)
-        # Upsert canonical across all groups
-        if content_hash in seen_canonical_in_batch:
-            # Already processed this content hash in this batch, just update existing canonical
-            canon = db.query(CanonicalMessage).filter(CanonicalMessage.content_hash == content_hash).first()
-            if canon:
-                canon.last_seen = ts
-                canon.occurrence_total = (canon.occurrence_total or 1) + 1
-                groups = set(canon.groups_seen or [])
-                groups.add(group.group_name)
-                canon.groups_seen = list(groups)
-        else:
-            # First time seeing this content hash in this batch
-            canon = db.query(CanonicalMessage).filter(CanonicalMessage.content_hash == content_hash).first()
-            if canon:
-                # Update existing canonical from previous batches
-                canon.last_seen = ts
-                canon.occurrence_total = (canon.occurrence_total or 1) + 1
-                groups = set(canon.groups_seen or [])
-                groups.add(group.group_name)
-                canon.groups_seen = list(groups)
-            else:
-                # Create new canonical entry
-                canon = CanonicalMessage(
-                    content_hash=content_hash,
-                    content=msg["body"],
-                    first_seen=ts,
-                    last_seen=ts,
-                    occurrence_total=1,
-                    groups_seen=[group.group_name],
-                )
-                db.add(canon)
-            seen_canonical_in_batch.add(content_hash)
-        inserted += 1
+        message_rows.append({
+            "id": uuid.uuid4(),
+            "message_id": mid,
+            "user_id": user.id,
+            "group_id": group.id,
+            "content": msg["body"],
+            "timestamp": ts,
+            "message_type": "text",
+            "reactions": None,
+            "links": _extract_links(msg["body"]),
+            "has_media": False,
+            "media_info": None,
+            "processed": False,
+            "content_hash": content_hash,
+            "first_seen": ts,
+            "last_seen": ts,
+            "occurrence_count": 1,
+        })
         seen_in_batch.add(mid)
-        seen_group_content_in_batch.add(group_content_key)
+        seen_hashes_in_batch.add(content_hash)
+    
+    db.add_all(new_users)
+    await db.flush()
+
+    inserted_hashes = set()
+    if message_rows:
+        # Insert new messages; an existing (group_id, content_hash) just bumps its
+        # occurrence metadata. `xmax = 0` tells freshly inserted rows from updated ones.
+        stmt = pg_insert(Message)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Message.group_id, Message.content_hash],
+            index_where=Message.content_hash.isnot(None),
+            set_={
+                "last_seen": func.coalesce(stmt.excluded.last_seen, func.now()),
+                "occurrence_count": func.coalesce(Message.occurrence_count, 1) + 1,
+            },
+        ).returning(Message.content_hash, literal_column("xmax = 0"))
+        for content_hash, was_inserted in (await db.execute(stmt, message_rows)).all():
+            if was_inserted:
+                inserted_hashes.add(content_hash)
+    inserted = len(inserted_hashes)
+    skipped += len(message_rows) - inserted
+
+    canonical_rows = [
+        {
+            "content_hash": row["content_hash"],
+            "content": row["content"],
+            "first_seen": row["timestamp"],
+            "last_seen": row["timestamp"],
+            "occurrence_total": 1,
+            "groups_seen": [group.group_name],
+        }
+        for row in message_rows
+        if row["content_hash"] in inserted_hashes
+    ]
+    if canonical_rows:
+        # Upsert canonical across all groups
+        stmt = pg_insert(CanonicalMessage)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[CanonicalMessage.content_hash],
+            set_={
+                "last_seen": stmt.excluded.last_seen,
+                "occurrence_total": func.coalesce(CanonicalMessage.occurrence_total, 1) + 1,
+                "groups_seen": case(
+                    (
+                        literal(group.group_name) == func.any(CanonicalMessage.groups_seen),
+                        CanonicalMessage.groups_seen,
+                    ),
+                    else_=func.array_append(CanonicalMessage.groups_seen, group.group_name),
+                ),
+            },
+        )
+        await db.execute(stmt, canonical_rows)
     
     try:
-        db.commit()
+        await db.commit()
     except Exception as e:
         # Surface DB errors clearly (e.g., connection, permissions)
         raise HTTPException(status_code=500, detail=f"Database error: {e}")
@@ -1,14 +1,23 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from sqlalchemy import func, literal_column, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import raiseload
+from pydantic import TypeAdapter
 from typing import List, Optional
 from uuid import UUID
 
+from ..core.cache import lookup_cache
+from ..core.responses import model_response
 from ..db.base import get_db
-from ..models.database import ItemForSale, User, Message
+from ..models.database import ItemForSale
 from ..schemas.items import ItemResponse, ItemCreate, ItemUpdate, ItemSearch
 
 router = APIRouter()
 
+# Built once; the endpoints below render their rows through these
+_item_adapter = TypeAdapter(ItemResponse)
+_items_adapter = TypeAdapter(List[ItemResponse])
+
 @router.get("/", response_model=List[ItemResponse])
 async def get_items(
     skip: int = Query(0, ge=0),
@@ -19,10 +28,11 @@ async def get_items(
     condition: Optional[str] = Query(None),
     location: Optional[str] = Query(None),
     availability_status: str = Query("available"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get all items with filtering options."""
-    query = db.query(ItemForSale).join(User).join(Message)
+    # ItemResponse exposes no relationships; raise on any accidental lazy load
+    query = select(ItemForSale).options(raiseload("*"))
     
     # Apply filters
     if category:
@@ -41,85 +51,97 @@ async def get_items(
     # Order by posted date (newest first)
     query = query.order_by(ItemForSale.posted_date.desc())
     
-    items = query.offset(skip).limit(limit).all()
-    return items
+    items = (await db.execute(query.offset(skip).limit(limit))).scalars().all()
+    return model_response(_items_adapter, items)
 
 @router.get("/{item_id}", response_model=ItemResponse)
-async def get_item(item_id: UUID, db: Session = Depends(get_db)):
+async def get_item(item_id: UUID, db: AsyncSession = Depends(get_db)):
     """Get specific item by ID."""
-    item = db.query(ItemForSale).filter(ItemForSale.id == item_id).first()
+    # Increment view count atomically and read the row back in one round trip
+    stmt = (
+        update(ItemForSale)
+        .where(ItemForSale.id == item_id)
+        .values(view_count=func.coalesce(ItemForSale.view_count, 0) + 1)
+        .returning(ItemForSale)
+    )
+    item = (await db.execute(stmt)).scalar_one_or_none()
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
     
-    # Increment view count
-    item.view_count += 1
-    db.commit()
+    await db.commit()
     
-    return item
+    return model_response(_item_adapter, item)
 
 @router.get("/search/", response_model=List[ItemResponse])
 async def search_items(
     q: str = Query(..., min_length=1),
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Search items by text query."""
-    query = db.query(ItemForSale).filter(
+    query = select(ItemForSale).options(raiseload("*")).filter(
         ItemForSale.availability_status == "available"
     ).filter(
-        (ItemForSale.title.ilike(f"%{q}%")) |
-        (ItemForSale.description.ilike(f"%{q}%")) |
-        (ItemForSale.category.ilike(f"%{q}%"))
+        # GIN-indexed full-text match; trigram-indexed title covers substrings
+        literal_column("items_for_sale.search_tsv").op("@@")(func.plainto_tsquery("english", q)) |
+        (ItemForSale.title.ilike(f"%{q}%"))
     ).order_by(ItemForSale.posted_date.desc())
     
-    items = query.offset(skip).limit(limit).all()
-    return items
+    items = (await db.execute(query.offset(skip).limit(limit))).scalars().all()
+    return model_response(_items_adapter, items)
 
 @router.get("/categories/")
-async def get_categories(db: Session = Depends(get_db)):
+async def get_categories(db: AsyncSession = Depends(get_db)):
     """Get all item categories."""
-    categories = db.query(ItemForSale.category).distinct().all()
-    return [cat[0] for cat in categories if cat[0]]
+    async def load_categories():
+        rows = await db.execute(select(ItemForSale.category).distinct())
+        return [cat[0] for cat in rows if cat[0]]
+
+    return await lookup_cache.get_or_set("item_categories", load_categories)
 
 @router.get("/user/{user_id}", response_model=List[ItemResponse])
 async def get_user_items(
     user_id: UUID,
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get items by specific user."""
-    items = db.query(ItemForSale).filter(
+    query = select(ItemForSale).options(raiseload("*")).filter(
         ItemForSale.user_id == user_id
-    ).order_by(ItemForSale.posted_date.desc()).offset(skip).limit(limit).all()
+    ).order_by(ItemForSale.posted_date.desc()).offset(skip).limit(limit)
+    items = (await db.execute(query)).scalars().all()
     
-    return items
+    return model_response(_items_adapter, items)
 
 @router.put("/{item_id}/status")
 async def update_item_status(
     item_id: UUID,
     status: str = Query(..., regex="^(available|sold|pending)$"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update item availability status."""
-    item = db.query(ItemForSale).filter(ItemForSale.id == item_id).first()
+    item = await db.get(ItemForSale, item_id)
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
     
     item.availability_status = status
-    db.commit()
+    await db.commit()
     
     return {"message": "Status updated successfully", "status": status}
 
 @router.post("/{item_id}/inquire")
-async def inquire_about_item(item_id: UUID, db: Session = Depends(get_db)):
+async def inquire_about_item(item_id: UUID, db: AsyncSession = Depends(get_db)):
     """Track inquiry about an item."""
-    item = db.query(ItemForSale).filter(ItemForSale.id == item_id).first()
-    if not item:
+    result = await db.execute(
+        update(ItemForSale)
+        .where(ItemForSale.id == item_id)
+        .values(inquiry_count=func.coalesce(ItemForSale.inquiry_count, 0) + 1)
+    )
+    if not result.rowcount:
         raise HTTPException(status_code=404, detail="Item not found")
     
-    item.inquiry_count += 1
-    db.commit()
+    await db.commit()
     
     return {"message": "Inquiry recorded"}
\ No newline at end of file
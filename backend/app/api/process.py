@@ -1,6 +1,8 @@
 from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from ..core.cache import lookup_cache
 from ..db.base import get_db
 from ..services.entity_extractor import EntityExtractor
 from ..models.database import Message, CanonicalMessage
@@ -8,45 +10,79 @@ from ..services.chat_export_parser import compute_content_hash
 
 router = APIRouter()
 
+# Rows per server-side cursor fetch in backfill_canonical
+_BACKFILL_CHUNK = 500
+
 @router.post("/run")
 async def run_processing(
     use_llm: bool = Query(False, description="Use LLM for extraction if keys configured"),
     batch: int = Query(200, ge=1, le=1000),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     extractor = EntityExtractor(db, use_llm=use_llm)
     stats = await extractor.process_unprocessed(limit=batch)
+    if stats["items"] or stats["apartments"]:
+        # New listings may introduce categories/listing types
+        lookup_cache.clear()
     return stats
 
 
 @router.post("/backfill-canonical")
 async def backfill_canonical(
     limit: int = Query(2000, ge=1, le=10000),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """Backfill canonical_messages from existing messages across all groups."""
-    rows = db.query(Message).order_by(Message.timestamp.desc()).limit(limit).all()
+    q = (
+        select(Message.content_hash, Message.content, Message.timestamp, Message.group_id)
+        .order_by(Message.timestamp.desc())
+        .limit(limit)
+        .execution_options(yield_per=_BACKFILL_CHUNK)
+    )
     upserted = 0
-    for r in rows:
-        ch = r.content_hash or compute_content_hash(r.content or "")
-        canon = db.query(CanonicalMessage).filter(CanonicalMessage.content_hash == ch).first()
-        if canon:
-            canon.last_seen = r.timestamp or canon.last_seen
-            canon.occurrence_total = (canon.occurrence_total or 1) + 1
-            groups = set(canon.groups_seen or [])
+    # Stream from a server-side cursor and flush each chunk, so memory stays
+    # bounded by the chunk size rather than `limit`
+    result = await db.stream(q)
+    async for rows in result.partitions():
+        hashes = [r.content_hash or compute_content_hash(r.content or "") for r in rows]
+        existing = {
+            c.content_hash: c
+            for c in (await db.execute(
+                select(CanonicalMessage).where(CanonicalMessage.content_hash.in_(set(hashes)))
+            )).scalars()
+        }
+        new_rows = {}
+        for r, ch in zip(rows, hashes):
             # we don't have group name here; cheap fallback to group_id string
-            groups.add(str(r.group_id) if r.group_id else "unknown")
-            canon.groups_seen = list(groups)
-        else:
-            canon = CanonicalMessage(
-                content_hash=ch,
-                content=r.content,
-                first_seen=r.timestamp,
-                last_seen=r.timestamp,
-                occurrence_total=1,
-                groups_seen=[str(r.group_id) if r.group_id else "unknown"],
-            )
-            db.add(canon)
-            upserted += 1
-    db.commit()
+            group_key = str(r.group_id) if r.group_id else "unknown"
+            canon = existing.get(ch)
+            if canon:
+                canon.last_seen = r.timestamp or canon.last_seen
+                canon.occurrence_total = (canon.occurrence_total or 1) + 1
+                groups = set(canon.groups_seen or [])
+                groups.add(group_key)
+                canon.groups_seen = list(groups)
+                continue
+            new = new_rows.get(ch)
+            if new:
+                new["last_seen"] = r.timestamp or new["last_seen"]
+                new["occurrence_total"] += 1
+                if group_key not in new["groups_seen"]:
+                    new["groups_seen"].append(group_key)
+            else:
+                new_rows[ch] = {
+                    "content_hash": ch,
+                    "content": r.content,
+                    "first_seen": r.timestamp,
+                    "last_seen": r.timestamp,
+                    "occurrence_total": 1,
+                    "groups_seen": [group_key],
+                }
+        if new_rows:
+            await db.execute(insert(CanonicalMessage), list(new_rows.values()))
+            upserted += len(new_rows)
+        # Later chunks re-read these canonicals from the DB; drop them from the identity map
+        await db.flush()
+        db.expunge_all()
+    await db.commit()
     return {"upserted": upserted}
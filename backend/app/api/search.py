@@ -1,14 +1,140 @@
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import text
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from sqlalchemy import DateTime, Integer, String, bindparam, text
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Awaitable, Callable, Optional
 from datetime import datetime
+import uuid
 
-from ..db.base import get_db
-from ..models.database import Message, CanonicalMessage
+from ..core.config import settings
+from ..core.responses import ORJSONResponse, dumps
+from ..db.base import get_db, get_redis
 
 router = APIRouter()
 
+# Rows per server-side cursor fetch for ?stream=true
+_STREAM_CHUNK = 100
+
+# One statement for every filter combination: absent filters are passed as
+# NULL/'' instead of changing the SQL text, so the statement (and Postgres'
+# plan for it) is reused across requests.
+# websearch_to_tsquery accepts "quoted phrases", `or` and -negation, and never
+# raises on user input
+_SEARCH_MESSAGES_QUERY = """
+    SELECT m.id, m.message_id, m.content, m.timestamp, m.user_id, m.group_id,
+           m.occurrence_count
+    FROM messages m
+    LEFT JOIN users u ON u.id = m.user_id
+    WHERE (:sender IS NULL OR u.display_name ILIKE '%' || :sender || '%')
+      AND (:after IS NULL OR m.timestamp > :after)
+      AND (:before IS NULL OR m.timestamp < :before)
+      AND (:q = '' OR m.content_tsv @@ websearch_to_tsquery('english', :q))
+      AND (:before_ts IS NULL OR (m.timestamp, m.id) < (:before_ts, :before_id))
+    ORDER BY m.timestamp DESC, m.id DESC
+    LIMIT :limit
+"""
+
+_SEARCH_MESSAGES_PARAMS = (
+    bindparam("sender", type_=String),
+    bindparam("after", type_=DateTime(timezone=True)),
+    bindparam("before", type_=DateTime(timezone=True)),
+    bindparam("q", type_=String),
+    bindparam("before_ts", type_=DateTime(timezone=True)),
+    bindparam("before_id", type_=UUID(as_uuid=True)),
+    bindparam("limit", type_=Integer),
+)
+
+_SEARCH_MESSAGES_SQL = text(_SEARCH_MESSAGES_QUERY).bindparams(*_SEARCH_MESSAGES_PARAMS)
+
+# The query text is parsed once in the CTE and shared by the match, rank and
+# headline; ts_headline only runs on the page of rows that survive the LIMIT
+_TOP_QUERY = """
+    WITH q AS (SELECT websearch_to_tsquery('english', :q) AS tsq),
+    top AS (
+        SELECT m.id, m.message_id, m.content, m.timestamp, m.group_id, m.occurrence_count,
+               ts_rank_cd(m.content_tsv, q.tsq) AS rank
+        FROM messages m
+        CROSS JOIN q
+        WHERE m.content_tsv @@ q.tsq
+        ORDER BY rank DESC, m.timestamp DESC
+        LIMIT :limit OFFSET :offset
+    )
+    SELECT t.id, t.message_id, t.content,
+           ts_headline('english', t.content, q.tsq, 'ShortWord=3, MaxFragments=2') AS snippet,
+           t.timestamp, t.group_id, g.group_name, t.occurrence_count, t.rank
+    FROM top t
+    CROSS JOIN q
+    LEFT JOIN groups g ON g.id = t.group_id
+    ORDER BY t.rank DESC, t.timestamp DESC
+"""
+
+_TOP_SQL = text(_TOP_QUERY)
+
+_CANONICAL_TOP_QUERY = """
+    WITH q AS (SELECT websearch_to_tsquery('english', :q) AS tsq),
+    top AS (
+        SELECT c.content_hash, c.content, c.occurrence_total, c.groups_seen,
+               ts_rank_cd(c.content_tsv, q.tsq) AS rank
+        FROM canonical_messages c
+        CROSS JOIN q
+        WHERE c.content_tsv @@ q.tsq
+        ORDER BY rank DESC
+        LIMIT :limit OFFSET :offset
+    )
+    SELECT t.content_hash, t.content,
+           ts_headline('english', t.content, q.tsq, 'ShortWord=3, MaxFragments=2') AS snippet,
+           t.occurrence_total, t.groups_seen, t.rank
+    FROM top t
+    CROSS JOIN q
+    ORDER BY t.rank DESC
+"""
+
+_CANONICAL_TOP_SQL = text(_CANONICAL_TOP_QUERY)
+
+# All three searches aggregated to JSON in a single statement, so the dashboard
+# costs one round trip and its body needs no Python-side encoding
+_DASHBOARD_SQL = text(
+    f"""
+    SELECT json_build_object(
+        'messages', (SELECT coalesce(json_agg(x ORDER BY x.timestamp DESC, x.id DESC), '[]')
+                     FROM ({_SEARCH_MESSAGES_QUERY}) x),
+        'top', (SELECT coalesce(json_agg(x ORDER BY x.rank DESC, x.timestamp DESC), '[]')
+                FROM ({_TOP_QUERY}) x),
+        'canonical', (SELECT coalesce(json_agg(x ORDER BY x.rank DESC), '[]')
+                      FROM ({_CANONICAL_TOP_QUERY}) x)
+    )::text
+    """
+).bindparams(*_SEARCH_MESSAGES_PARAMS, bindparam("offset", type_=Integer))
+
+
+async def _cached_json(redis: Redis, key: str, load: Callable[[], Awaitable[list]]) -> Response:
+    """Serve a JSON body from Redis, or build it with `load` and cache it for
+    SEARCH_CACHE_TTL seconds. Redis being unavailable only skips the cache."""
+    ttl = settings.SEARCH_CACHE_TTL
+    if ttl > 0:
+        try:
+            hit = await redis.get(key)
+        except RedisError:
+            hit = None
+        if hit is not None:
+            return Response(content=hit, media_type="application/json")
+    response = ORJSONResponse(await load())
+    if ttl > 0:
+        try:
+            await redis.setex(key, ttl, response.body)
+        except RedisError:
+            pass
+    return response
+
+
+def _cache_key(prefix: str, q: str, limit: int, offset: int) -> str:
+    # FTS is case-insensitive, so "Desk " and "desk" can share an entry
+    return f"{prefix}:{' '.join(q.lower().split())}:{limit}:{offset}"
+
+
 @router.get("/messages")
 async def search_messages(
     q: str = Query("", description="Full-text search on message content"),
@@ -16,46 +142,42 @@ async def search_messages(
     after: Optional[datetime] = Query(None, description="Only messages after this UTC timestamp"),
     before: Optional[datetime] = Query(None, description="Only messages before this UTC timestamp"),
     limit: int = Query(50, ge=1, le=200),
-    offset: int = Query(0, ge=0),
-    db: Session = Depends(get_db),
+    before_ts: Optional[datetime] = Query(None, description="Cursor: timestamp of the last message on the previous page"),
+    before_id: Optional[uuid.UUID] = Query(None, description="Cursor: id of the last message on the previous page"),
+    stream: bool = Query(False, description="Stream rows as NDJSON instead of one JSON page"),
+    db: AsyncSession = Depends(get_db),
 ):
-    query = db.query(Message)
-
-    if sender:
-        # Join to users only if needed
-        from ..models.database import User
-        query = query.join(User).filter(User.display_name.ilike(f"%{sender}%"))
-
-    if after:
-        query = query.filter(Message.timestamp > after)
-    if before:
-        query = query.filter(Message.timestamp < before)
-
-    if q:
-        # Use full-text search when possible, fallback to ILIKE
-        # Note: Using plain to_tsquery for better ranking, sanitize q into terms
-        ts_query = " & ".join([part for part in q.split() if part])
-        if ts_query:
-            query = query.filter(text("content_tsv @@ plainto_tsquery(:q)")).params(q=q)
-        else:
-            query = query.filter(Message.content.ilike(f"%{q}%"))
-
-    query = query.order_by(Message.timestamp.desc())
-
-    # Rank by timestamp desc as secondary; FTS rank could be added if needed
-    rows: List[Message] = query.offset(offset).limit(limit).all()
-    return [
-        {
-            "id": str(row.id),
-            "message_id": row.message_id,
-            "content": row.content,
-            "timestamp": row.timestamp,
-            "user_id": str(row.user_id) if row.user_id else None,
-            "group_id": str(row.group_id) if row.group_id else None,
-            "occurrence_count": row.occurrence_count,
-        }
-        for row in rows
-    ]
+    # Keyset pagination on (timestamp, id): each page is an index seek instead
+    # of scanning and discarding every earlier page's rows
+    if (before_ts is None) != (before_id is None):
+        raise HTTPException(status_code=400, detail="before_ts and before_id must be passed together")
+    params = {
+        "sender": sender or None,
+        "after": after,
+        "before": before,
+        "q": q.strip(),
+        "before_ts": before_ts,
+        "before_id": before_id,
+        "limit": limit,
+    }
+    if stream:
+        # Server-side cursor: rows are encoded and sent as they arrive, so memory
+        # stays flat and the first line goes out before the last row is read
+        result = await db.stream(_SEARCH_MESSAGES_SQL.execution_options(yield_per=_STREAM_CHUNK), params)
+
+        async def lines():
+            async for row in result:
+                yield dumps(row._asdict()) + b"\n"
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    # Plain Core rows straight to dicts: no ORM hydration, no mapping wrapper
+    results = [r._asdict() for r in await db.execute(_SEARCH_MESSAGES_SQL, params)]
+    next_cursor = None
+    if len(results) == limit:
+        last = results[-1]
+        next_cursor = {"before_ts": last["timestamp"], "before_id": last["id"]}
+    return ORJSONResponse({"results": results, "next_cursor": next_cursor})
 
 
 @router.get("/top")
@@ -63,40 +185,21 @@ async def top_search_results(
     q: str = Query(..., min_length=1, description="Full-text query"),
     limit: int = Query(10, ge=1, le=50),
     offset: int = Query(0, ge=0),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
+    redis: Redis = Depends(get_redis),
 ):
     """Return top-ranked results across all groups using Postgres full-text search.
     Includes snippet and occurrence_count for quick triage.
     """
-    sql = text(
-        """
-        SELECT m.id, m.message_id, m.content, m.timestamp, m.user_id, m.group_id,
-               m.occurrence_count,
-               g.group_name,
-               ts_rank_cd(m.content_tsv, plainto_tsquery(:q)) AS rank,
-               ts_headline('english', m.content, plainto_tsquery(:q), 'ShortWord=3, MaxFragments=2') AS snippet
-        FROM messages m
-        LEFT JOIN groups g ON g.id = m.group_id
-        WHERE m.content_tsv @@ plainto_tsquery(:q)
-        ORDER BY rank DESC, m.timestamp DESC
-        LIMIT :limit OFFSET :offset
-        """
-    )
-    res = db.execute(sql, {"q": q, "limit": limit, "offset": offset}).mappings().all()
-    return [
-        {
-            "id": str(r["id"]),
-            "message_id": r["message_id"],
-            "content": r["content"],
-            "snippet": r["snippet"],
-            "timestamp": r["timestamp"],
-            "group_id": str(r["group_id"]) if r["group_id"] else None,
-            "group_name": r["group_name"],
-            "occurrence_count": r["occurrence_count"],
-            "rank": float(r["rank"]) if r["rank"] is not None else None,
-        }
-        for r in res
-    ]
+    if not q.strip():
+        return []
+
+    async def load():
+        res = await db.execute(_TOP_SQL, {"q": q, "limit": limit, "offset": offset})
+        # Columns are selected in response order; orjson serializes the rows as-is
+        return [r._asdict() for r in res]
+
+    return await _cached_json(redis, _cache_key("search:top", q, limit, offset), load)
 
 
 @router.get("/canonical/top")
@@ -104,28 +207,37 @@ async def canonical_top(
     q: str = Query(..., min_length=1),
     limit: int = Query(10, ge=1, le=50),
     offset: int = Query(0, ge=0),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
+    redis: Redis = Depends(get_redis),
 ):
-    sql = text(
-        """
-        SELECT c.content_hash, c.content, c.occurrence_total, c.groups_seen,
-               ts_rank_cd(to_tsvector('english', coalesce(c.content, '')), plainto_tsquery(:q)) AS rank,
-               ts_headline('english', c.content, plainto_tsquery(:q), 'ShortWord=3, MaxFragments=2') AS snippet
-        FROM canonical_messages c
-        WHERE to_tsvector('english', coalesce(c.content, '')) @@ plainto_tsquery(:q)
-        ORDER BY rank DESC
-        LIMIT :limit OFFSET :offset
-        """
-    )
-    res = db.execute(sql, {"q": q, "limit": limit, "offset": offset}).mappings().all()
-    return [
-        {
-            "content_hash": r["content_hash"],
-            "content": r["content"],
-            "snippet": r["snippet"],
-            "occurrence_total": r["occurrence_total"],
-            "groups_seen": r["groups_seen"],
-            "rank": float(r["rank"]) if r["rank"] is not None else None,
-        }
-        for r in res
-    ]
+    if not q.strip():
+        return []
+
+    async def load():
+        res = await db.execute(_CANONICAL_TOP_SQL, {"q": q, "limit": limit, "offset": offset})
+        return [r._asdict() for r in res]
+
+    return await _cached_json(redis, _cache_key("search:canonical", q, limit, offset), load)
+
+
+@router.get("/dashboard")
+async def search_dashboard(
+    q: str = Query(..., min_length=1, description="Full-text query"),
+    limit: int = Query(10, ge=1, le=50),
+    db: AsyncSession = Depends(get_db),
+):
+    """First page of /messages, /top and /canonical/top for `q` in one round trip."""
+    if not q.strip():
+        return {"messages": [], "top": [], "canonical": []}
+    params = {
+        "sender": None,
+        "after": None,
+        "before": None,
+        "q": q.strip(),
+        "before_ts": None,
+        "before_id": None,
+        "limit": limit,
+        "offset": 0,
+    }
+    body = (await db.execute(_DASHBOARD_SQL, params)).scalar_one()
+    return Response(content=body, media_type="application/json")
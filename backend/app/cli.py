@@ -1,4 +1,5 @@
 import argparse
+import sys
 from datetime import datetime
 from pathlib import Path
 from sqlalchemy.orm import Session
@@ -14,7 +15,22 @@ def parse_args() -> argparse.Namespace:
     return p.parse_args()
 
 
+def migrate():
+    """Create tables and the search/dedup columns and indexes. Idempotent; run
+    once per deploy before starting the API."""
+    from .db.base import Base, engine
+    from .db.search_index import ensure_postgres_full_text_search
+    from .models import database  # noqa: F401  (registers the tables on Base)
+
+    Base.metadata.create_all(bind=engine)
+    ensure_postgres_full_text_search(engine)
+    print("Migrations applied")
+
+
 def main():
+    if sys.argv[1:2] == ["migrate"]:
+        migrate()
+        return
     args = parse_args()
     since_dt = None
     if args.since:
@@ -0,0 +1,29 @@
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+from .config import settings
+
+
+class TTLCache:
+    """Small in-process cache for lookup responses that change on ingest cadence,
+    not per request. Entries expire after `ttl` seconds or on `clear()`.
+    """
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._store: Dict[Hashable, Tuple[float, Any]] = {}
+
+    async def get_or_set(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        now = time.monotonic()
+        hit = self._store.get(key)
+        if hit is not None and hit[0] > now:
+            return hit[1]
+        value = await factory()
+        self._store[key] = (now + self.ttl, value)
+        return value
+
+    def clear(self) -> None:
+        self._store.clear()
+
+
+# Shared cache for filter/category option lists; cleared when new listings are extracted
+lookup_cache = TTLCache(ttl=settings.LOOKUP_CACHE_TTL)
@@ -0,0 +1,34 @@
+import uuid
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from fastapi.responses import ORJSONResponse as _ORJSONResponse, Response
+from pydantic import TypeAdapter
+
+
+def _default(obj: Any) -> Any:
+    # asyncpg returns its own UUID subclass, which orjson won't take natively
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    if isinstance(obj, Decimal):
+        return float(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class ORJSONResponse(_ORJSONResponse):
+    """orjson-rendered response that also accepts raw driver rows (UUIDs, Decimals)."""
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def model_response(adapter: TypeAdapter, content: Any) -> Response:
+    """Validate `content` (ORM rows) against `adapter`'s type and render it to
+    JSON in the same pydantic-core pass. Returned as a Response, it skips
+    FastAPI's response_model handling, which validates, dumps to plain Python
+    objects and then encodes those again."""
+    return Response(adapter.dump_json(adapter.validate_python(content)), media_type="application/json")
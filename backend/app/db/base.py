@@ -1,5 +1,9 @@
+import uuid
+
+import redis.asyncio as aioredis
 from sqlalchemy import create_engine
 from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from ..core.config import settings
@@ -15,18 +19,56 @@ if url_obj.drivername.startswith("postgresql"):
     if host not in ("localhost", "127.0.0.1") and "sslmode=" not in str(db_url):
         connect_args["sslmode"] = "require"
 
+# Sync engine: used by the CLI and schema setup
 engine = create_engine(
     db_url,
     pool_pre_ping=True,
+    pool_recycle=settings.DB_POOL_RECYCLE,
     connect_args=connect_args,
 )
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine: used by the API so queries don't block the event loop.
+# asyncpg takes `ssl` rather than libpq's `sslmode`.
+async_url_obj = url_obj
+async_connect_args = {}
+if url_obj.drivername.startswith("postgresql"):
+    async_url_obj = url_obj.set(drivername="postgresql+asyncpg").difference_update_query(["sslmode"])
+    sslmode = url_obj.query.get("sslmode") or connect_args.get("sslmode")
+    if sslmode:
+        async_connect_args["ssl"] = sslmode
+
+# PgBouncer in transaction mode hands each transaction a different server
+# connection, so named prepared statements can't be cached or reused.
+# sslmode still applies to the client -> PgBouncer hop; add sslmode=disable to
+# DATABASE_URL when the pooler doesn't terminate TLS.
+if settings.DB_PGBOUNCER:
+    async_url_obj = async_url_obj.update_query_dict({"prepared_statement_cache_size": "0"})
+    async_connect_args["statement_cache_size"] = 0
+    async_connect_args["prepared_statement_name_func"] = lambda: f"__asyncpg_{uuid.uuid4()}__"
+
+async_engine = create_async_engine(
+    async_url_obj,
+    pool_pre_ping=True,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    # Room for every module-level search/list statement variant in the compiled
+    # SQL cache; asyncpg then reuses its prepared statement for each
+    query_cache_size=1200,
+    connect_args=async_connect_args,
+)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
\ No newline at end of file
+
+# Shared Redis client; connections are pooled and opened lazily on first use
+redis_client = aioredis.from_url(settings.REDIS_URL, socket_connect_timeout=0.5, socket_timeout=0.5)
+
+async def get_redis():
+    return redis_client
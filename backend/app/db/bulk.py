@@ -0,0 +1,61 @@
+import io
+import json
+from typing import Any, Callable, Iterable, List, Optional, Sequence
+
+from sqlalchemy import ARRAY, JSON, String, Table
+
+# Characters COPY's text format needs escaped inside a field
+_COPY_ESCAPES = str.maketrans({"\\": "\\\\", "\n": "\\n", "\r": "\\r", "\t": "\\t"})
+
+
+def _pg_array(values: List[str]) -> str:
+    """Postgres text[] literal; every element is quoted."""
+    return "{" + ",".join(
+        '"' + v.replace("\\", "\\\\").replace('"', '\\"') + '"' for v in values
+    ) + "}"
+
+
+def _json_field(value: Any) -> str:
+    return ("null" if value is JSON.NULL else json.dumps(value)).translate(_COPY_ESCAPES)
+
+
+def _array_field(values: List[str]) -> str:
+    return _pg_array(values).translate(_COPY_ESCAPES)
+
+
+def _text_field(value: Any) -> str:
+    return str(value).translate(_COPY_ESCAPES)
+
+
+def _copy_converter(column_type: Any) -> Callable[[Any], str]:
+    if isinstance(column_type, JSON):
+        return _json_field
+    if isinstance(column_type, ARRAY):
+        return _array_field
+    if isinstance(column_type, String):
+        return _text_field
+    # Numbers, booleans, timestamps and UUIDs never need escaping
+    return str
+
+
+def copy_rows(
+    cursor,
+    target: Table,
+    columns: Sequence[str],
+    rows: Iterable[Sequence[Any]],
+    into: Optional[str] = None,
+) -> None:
+    """COPY `rows`, value tuples in `columns` order, into `target` (or the table
+    named `into`, shaped like it). Values are written as the ORM would bind them
+    for `target`'s column types, except that None is always SQL NULL: pass
+    JSON.NULL for a JSON null."""
+    converters = [_copy_converter(target.c[c].type) for c in columns]
+    buf = io.StringIO()
+    for row in rows:
+        buf.write("\t".join(
+            "\\N" if v is None else convert(v)
+            for convert, v in zip(converters, row)
+        ))
+        buf.write("\n")
+    buf.seek(0)
+    cursor.copy_expert(f"COPY {into or target.name} ({', '.join(columns)}) FROM STDIN", buf)
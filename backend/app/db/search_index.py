@@ -7,17 +7,101 @@ ALTER TABLE IF EXISTS messages
     GENERATED ALWAYS AS (to_tsvector('english', coalesce(content, ''))) STORED;
 """
 
+# Default tsvector_ops GIN index. A negation-only search ("-foo") can't use it
+# and falls back to a sequential scan
 DDL_CREATE_TSV_INDEX = """
 CREATE INDEX IF NOT EXISTS idx_messages_content_tsv
 ON messages USING GIN (content_tsv);
 """
 
+# Keyset pagination order for /search/messages
+DDL_CREATE_MESSAGES_TS_ID_INDEX = """
+CREATE INDEX IF NOT EXISTS idx_messages_ts_id
+ON messages (timestamp DESC, id DESC);
+"""
+
 DDL_CREATE_GROUP_CONTENT_HASH_INDEX = """
 CREATE UNIQUE INDEX IF NOT EXISTS idx_messages_group_contenthash
 ON messages (group_id, content_hash)
 WHERE content_hash IS NOT NULL;
 """
 
+# The message processor looks up earlier messages with the exact same text to
+# reuse their extraction; md5 keeps the index entries small for long posts
+DDL_CREATE_CONTENT_MD5_INDEX = """
+CREATE INDEX IF NOT EXISTS idx_messages_content_md5
+ON messages (md5(content))
+WHERE processed;
+"""
+
+# Composite indexes matching the list endpoints' `WHERE availability_status = ?
+# ORDER BY posted_date DESC LIMIT n` so they become index range scans
+DDL_CREATE_LISTING_INDEXES = """
+CREATE INDEX IF NOT EXISTS ix_apartments_status_posted
+ON apartments (availability_status, posted_date DESC);
+CREATE INDEX IF NOT EXISTS ix_items_status_posted
+ON items_for_sale (availability_status, posted_date DESC);
+"""
+
+# Ingest falls back to looking users up by display name
+DDL_CREATE_USER_DISPLAY_NAME_INDEX = """
+CREATE INDEX IF NOT EXISTS ix_users_display_name
+ON users (display_name);
+"""
+
+DDL_CREATE_LISTING_TSV = """
+ALTER TABLE IF EXISTS items_for_sale
+    ADD COLUMN IF NOT EXISTS search_tsv tsvector
+    GENERATED ALWAYS AS (to_tsvector('english',
+        coalesce(title, '') || ' ' || coalesce(description, '') || ' ' || coalesce(category, ''))) STORED;
+CREATE INDEX IF NOT EXISTS ix_items_search_tsv
+ON items_for_sale USING GIN (search_tsv);
+ALTER TABLE IF EXISTS apartments
+    ADD COLUMN IF NOT EXISTS search_tsv tsvector
+    GENERATED ALWAYS AS (to_tsvector('english',
+        coalesce(address, '') || ' ' || coalesce(listing_type, ''))) STORED;
+CREATE INDEX IF NOT EXISTS ix_apartments_search_tsv
+ON apartments USING GIN (search_tsv);
+"""
+
+# Contact string the export/bot endpoints return, extracted once at write time
+DDL_CREATE_CONTACT_RAW = """
+ALTER TABLE IF EXISTS items_for_sale
+    ADD COLUMN IF NOT EXISTS contact_raw text
+    GENERATED ALWAYS AS (contact_info->>'raw') STORED;
+ALTER TABLE IF EXISTS apartments
+    ADD COLUMN IF NOT EXISTS contact_raw text
+    GENERATED ALWAYS AS (contact_info->>'raw') STORED;
+"""
+
+# Trigram indexes keep substring (ILIKE '%q%') matches on short fields indexable
+DDL_CREATE_LISTING_TRGM = """
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX IF NOT EXISTS ix_items_title_trgm
+ON items_for_sale USING GIN (title gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS ix_apartments_address_trgm
+ON apartments USING GIN (address gin_trgm_ops);
+"""
+
+# Sender-name substring filters (/search/messages?sender=, bot q=) on users
+DDL_CREATE_USER_DISPLAY_NAME_TRGM = """
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX IF NOT EXISTS idx_users_display_name_trgm
+ON users USING GIN (display_name gin_trgm_ops);
+"""
+
+# Multicolumn GIN (needs btree_gin for the timestamp column) so a text match
+# combined with an after/before range is resolved inside one index scan.
+# This stands in for range-partitioning messages by month: a partitioned table
+# needs `timestamp` in every unique constraint, which would break the unique
+# message_id, the (group_id, content_hash) dedup index that ingest upserts
+# against, and the items/apartments foreign keys to messages.id
+DDL_CREATE_MESSAGES_TSV_TS_INDEX = """
+CREATE EXTENSION IF NOT EXISTS btree_gin;
+CREATE INDEX IF NOT EXISTS idx_messages_tsv_ts
+ON messages USING GIN (content_tsv, timestamp);
+"""
+
 DDL_ADD_DEDUP_COLUMNS = """
 ALTER TABLE IF EXISTS messages
     ADD COLUMN IF NOT EXISTS content_hash text,
@@ -37,14 +121,47 @@ CREATE TABLE IF NOT EXISTS canonical_messages (
 );
 """
 
+DDL_CREATE_CANONICAL_TSV = """
+ALTER TABLE IF EXISTS canonical_messages
+    ADD COLUMN IF NOT EXISTS content_tsv tsvector
+    GENERATED ALWAYS AS (to_tsvector('english', coalesce(content, ''))) STORED;
+CREATE INDEX IF NOT EXISTS idx_canonical_content_tsv
+ON canonical_messages USING GIN (content_tsv);
+"""
+
 def ensure_postgres_full_text_search(engine: Engine) -> None:
-    """Ensure Postgres full-text search column and index exist for messages.content.
+    """Ensure Postgres full-text search column and index exist for messages.content,
+    along with the dedup columns, listing search columns and the indexes backing
+    the hot list/search queries.
     Safe to run multiple times.
     """
     with engine.connect() as conn:
         conn.execute(text(DDL_CREATE_TSV_COLUMN))
         conn.execute(text(DDL_CREATE_TSV_INDEX))
+        conn.execute(text(DDL_CREATE_MESSAGES_TS_ID_INDEX))
         conn.execute(text(DDL_ADD_DEDUP_COLUMNS))
         conn.execute(text(DDL_CREATE_GROUP_CONTENT_HASH_INDEX))
+        conn.execute(text(DDL_CREATE_CONTENT_MD5_INDEX))
         conn.execute(text(DDL_CREATE_CANONICAL))
+        conn.execute(text(DDL_CREATE_CANONICAL_TSV))
+        conn.execute(text(DDL_CREATE_LISTING_INDEXES))
+        conn.execute(text(DDL_CREATE_USER_DISPLAY_NAME_INDEX))
+        conn.execute(text(DDL_CREATE_LISTING_TSV))
+        conn.execute(text(DDL_CREATE_CONTACT_RAW))
         conn.commit()
+    # pg_trgm may not be installable on every host; the trigram indexes only
+    # speed up substring matches, so don't let them roll back the rest
+    try:
+        with engine.connect() as conn:
+            conn.execute(text(DDL_CREATE_LISTING_TRGM))
+            conn.execute(text(DDL_CREATE_USER_DISPLAY_NAME_TRGM))
+            conn.commit()
+    except Exception as e:
+        print(f"Trigram index init warning: {e}")
+    # Same for btree_gin: the plain content_tsv GIN index already covers search
+    try:
+        with engine.connect() as conn:
+            conn.execute(text(DDL_CREATE_MESSAGES_TSV_TS_INDEX))
+            conn.commit()
+    except Exception as e:
+        print(f"btree_gin index init warning: {e}")
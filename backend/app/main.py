@@ -1,39 +1,27 @@
-from fastapi import FastAPI
+import orjson
+from fastapi import FastAPI, Response
 from sqlalchemy import text
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy import create_engine
 
 from .core.config import settings
-from .db.base import Base, engine
-from .db.search_index import ensure_postgres_full_text_search
+from .core.responses import ORJSONResponse
+from .db.base import async_engine, redis_client
 from .api import items, apartments, search, ingest, process, bot, export
 
-# Defer DB initialization to application startup to avoid import-time failures
-def _init_db():
-    try:
-        # Create database tables
-        Base.metadata.create_all(bind=engine)
-        # Ensure search index
-        try:
-            ensure_postgres_full_text_search(engine)
-        except Exception as e:
-            # Non-fatal during first boot/migrations
-            print(f"Search index init warning: {e}")
-    except Exception as e:
-        # Avoid crashing the app on environments without DB (e.g., Vercel without managed DB yet)
-        print(f"Database init warning: {e}")
-
 app = FastAPI(
     title=settings.PROJECT_NAME,
     version="1.0.0",
     description="University Group Chat Data Management API",
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    default_response_class=ORJSONResponse,
 )
 
-# Run DB initialization on startup (keeps Docker behavior, avoids import-time connect)
-@app.on_event("startup")
-async def on_startup():
-    _init_db()
+# Close pooled asyncpg/Redis connections cleanly instead of leaving them to GC
+@app.on_event("shutdown")
+async def on_shutdown():
+    await async_engine.dispose()
+    await redis_client.aclose()
 
 # Set up CORS
 app.add_middleware(
@@ -58,25 +46,33 @@ app.include_router(export.router, prefix=f"{settings.API_V1_STR}/export", tags=[
 async def db_ping_prefixed():
     return await db_ping()
 
+@app.get(f"{settings.API_V1_STR}/db/pool")
+async def db_pool_prefixed():
+    return await db_pool()
+
+# Static bodies for the root and probe endpoints, encoded once at import
+_ROOT_BODY = orjson.dumps({
+    "message": "University Group Chat Data Management API",
+    "version": "1.0.0",
+    "docs": "/docs"
+})
+_HEALTH_BODY = orjson.dumps({"status": "healthy", "timestamp": "2024-01-01T00:00:00Z"})
+
 @app.get("/")
 async def root():
-    return {
-        "message": "University Group Chat Data Management API",
-        "version": "1.0.0",
-        "docs": "/docs"
-    }
+    return Response(content=_ROOT_BODY, media_type="application/json")
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "timestamp": "2024-01-01T00:00:00Z"}
+    return Response(content=_HEALTH_BODY, media_type="application/json")
 
 @app.get("/db/ping")
 async def db_ping():
     try:
-        with engine.connect() as conn:
-            ver = conn.execute(text("select version()"))
+        async with async_engine.connect() as conn:
+            ver = await conn.execute(text("select version()"))
             version = ver.scalar() or "unknown"
-        url = engine.url
+        url = async_engine.url
         safe = {
             "driver": url.drivername,
             "host": url.host,
@@ -85,4 +81,16 @@ async def db_ping():
         }
         return {"ok": True, "db": safe, "version": version}
     except Exception as e:
-        return {"ok": False, "error": str(e)}
\ No newline at end of file
+        return {"ok": False, "error": str(e)}
+
+@app.get("/db/pool")
+async def db_pool():
+    # Surface pool saturation (checked out vs. overflow) for the API engine
+    pool = async_engine.sync_engine.pool
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "status": pool.status(),
+    }
\ No newline at end of file
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, UUID4
+from pydantic import BaseModel, ConfigDict, UUID4
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 from decimal import Decimal
@@ -26,9 +26,8 @@ class ApartmentResponse(ApartmentBase):
     view_count: int
     inquiry_count: int
     contact_info: Optional[Dict[str, Any]] = None
-    
-    class Config:
-        from_attributes = True
+
+    model_config = ConfigDict(from_attributes=True)
 
 class ApartmentSearch(BaseModel):
     query: str
@@ -12,6 +12,16 @@ class CategorizationResult(BaseModel):
     )
 
 
+# Categorization of several messages in one request, matched back by index
+class IndexedCategory(BaseModel):
+    index: int = Field(description="Index of the message, as given in the prompt")
+    category: Literal["ITEM_FOR_SALE", "APARTMENT_LISTING", "GENERAL"]
+
+
+class BatchCategorizationResult(BaseModel):
+    results: List[IndexedCategory]
+
+
 # Item for sale extraction schema
 class SalesExtraction(BaseModel):
     title: str = Field(description="Brief item title")
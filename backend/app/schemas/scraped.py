@@ -0,0 +1,25 @@
+from typing import Annotated, Any, List, Optional
+
+from pydantic import BaseModel, Field, StringConstraints
+
+# Rows of the scraper's JSON, validated before processing. Unknown keys are
+# ignored; defaults match what the processor assumed for missing keys
+
+
+class MemberIn(BaseModel):
+    phone: Annotated[str, StringConstraints(strip_whitespace=True, min_length=1)]
+    name: Optional[str] = "Unknown"
+
+
+class MessageIn(BaseModel):
+    id: str
+    timestamp: float
+    body: str = ""
+    author_phone: Optional[Annotated[str, StringConstraints(strip_whitespace=True)]] = Field(
+        default=None, alias="authorPhone"
+    )
+    type: str = "text"
+    reactions: Optional[List[Any]] = Field(default_factory=list)
+    links: Optional[List[str]] = Field(default_factory=list)
+    has_media: bool = Field(default=False, alias="hasMedia")
+    media: Any = None
@@ -1,16 +1,38 @@
 import re
 from datetime import datetime, timezone
-from typing import Iterator, List, Dict, Any, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Iterator, List, Dict, Any, Optional
 import hashlib
 import re as _re
 
-TIMESTAMP_LINE_REGEX = re.compile(
-    r"^\[(?P<date>\d{1,2}/\d{1,2}/\d{2,4}),\s*(?P<time>\d{1,2}:\d{2}(?::\d{2})?\s*(?:AM|PM|am|pm)?)\]\s*~?\s*(?P<sender>[^:]+):\s?(?P<body>.*?)(?=^\[|\Z)",
-    re.DOTALL | re.MULTILINE | re.IGNORECASE
+# Header of each message: "[date, time] sender: ", with the date and time
+# fields captured individually. Bodies are sliced out between headers rather
+# than matched lazily, which made the regex engine try a lookahead at every
+# character of every body.
+LINE_START = re.compile(
+    r"^\[(\d{1,2})/(\d{1,2})/(\d{4}|\d{2}),\s*(\d{1,2}):(\d{2})(?::(\d{2}))?\s*([AaPp][Mm])?\]"
+    r"\s*~?\s*([^:\n]+):\s?",
+    re.MULTILINE,
 )
+# A body runs until the next line that opens with "["
+_BODY_END = re.compile(r"^\[", re.MULTILINE)
+
+# Below this many characters, starting worker processes costs more than it saves
+_PARALLEL_MIN_CHARS = 4 * 1024 * 1024
+# Size of the pieces a single-process parse reads the export in
+_PIECE_CHARS = 1024 * 1024
 
 URL_REGEX = re.compile(r"https?://[^\s]+", re.IGNORECASE)
 PHONE_IN_NAME_REGEX = re.compile(r"\+?\d[\d\s\-()]{6,}")
+# Everything the phone patterns match besides digits and "+": their separators
+# plus each character \s matches. Deleted with str.translate, which skips the
+# regex engine on every phone number
+_PHONE_SEPARATORS = str.maketrans("", "", (
+    "-()\t\n\x0b\x0c\r\x1c\x1d\x1e\x1f \x85\xa0\u1680"
+    "\u2000\u2001\u2002\u2003\u2004\u2005\u2006\u2007\u2008\u2009\u200a"
+    "\u2028\u2029\u202f\u205f\u3000"
+))
 
 # Some exports contain a narrow no-break space before AM/PM. Normalize it.
 SPACE_NORMALIZER = str.maketrans({
@@ -18,60 +40,67 @@ SPACE_NORMALIZER = str.maketrans({
     "\u00A0": " ",  # non-breaking space
 })
 
-def _try_parse_datetime(date_str: str, time_str: str) -> Optional[datetime]:
-    """Try multiple datetime formats commonly found in WhatsApp exports.
-    Returns timezone-aware UTC datetime if possible.
+def _try_parse_datetime(
+    first: str, second_field: str, year_str: str, hour_str: str, minute_str: str,
+    sec_str: Optional[str], ampm: Optional[str],
+) -> Optional[datetime]:
+    """Build the datetime of a WhatsApp export header from LINE_START's fields,
+    day-first with a month-first fallback. Returns timezone-aware UTC datetime
+    if possible.
     """
-    raw = f"{date_str}, {time_str}".translate(SPACE_NORMALIZER).strip()
-    patterns: List[Tuple[str, bool]] = [
-        ("%d/%m/%y, %I:%M:%S %p", True),
-        ("%d/%m/%y, %I:%M %p", True),
-        ("%d/%m/%y, %H:%M:%S", True),
-        ("%d/%m/%y, %H:%M", True),
-        ("%d/%m/%Y, %I:%M:%S %p", True),
-        ("%d/%m/%Y, %I:%M %p", True),
-        ("%d/%m/%Y, %H:%M:%S", True),
-        ("%d/%m/%Y, %H:%M", True),
-        # Fallbacks for month-first locales
-        ("%m/%d/%y, %I:%M:%S %p", False),
-        ("%m/%d/%y, %I:%M %p", False),
-        ("%m/%d/%y, %H:%M:%S", False),
-        ("%m/%d/%y, %H:%M", False),
-        ("%m/%d/%Y, %I:%M:%S %p", False),
-        ("%m/%d/%Y, %I:%M %p", False),
-        ("%m/%d/%Y, %H:%M:%S", False),
-        ("%m/%d/%Y, %H:%M", False),
-    ]
-    
-    for fmt, _ in patterns:
-        try:
-            dt = datetime.strptime(raw, fmt)
-            # Assume local export time; store as UTC naive by default -> convert to UTC-aware
-            return dt.replace(tzinfo=timezone.utc)
-        except ValueError:
-            continue
-    return None
+    a = int(first)
+    b = int(second_field)
+    year = int(year_str)
+    hour = int(hour_str)
+    if len(year_str) == 2:
+        # Same pivot as strptime's %y: 69-99 -> 19xx, 00-68 -> 20xx
+        year += 1900 if year >= 69 else 2000
+    if ampm:
+        # 12-hour clock: 12 AM is midnight, 12 PM is noon
+        if not 1 <= hour <= 12:
+            return None
+        hour = hour % 12 + (12 if ampm[0] in "Pp" else 0)
+    minute = int(minute_str)
+    second = int(sec_str) if sec_str else 0
+    # Assume local export time; store as UTC naive by default -> convert to UTC-aware
+    try:
+        return datetime(year, b, a, hour, minute, second, tzinfo=timezone.utc)
+    except ValueError:
+        pass
+    # Fallback for month-first locales
+    try:
+        return datetime(year, a, b, hour, minute, second, tzinfo=timezone.utc)
+    except ValueError:
+        return None
 
 def _extract_links(text: str) -> List[str]:
-    return URL_REGEX.findall(text or "")
+    # Most messages carry no link; skip the regex scan for them
+    if not text or "://" not in text:
+        return []
+    return URL_REGEX.findall(text)
 
 def _extract_phone_from_name(sender: str) -> Optional[str]:
     m = PHONE_IN_NAME_REGEX.search(sender)
     if m:
         # Normalize digits only with leading + if present
-        digits = re.sub(r"[^\d+]", "", m.group(0))
+        digits = m.group(0).translate(_PHONE_SEPARATORS)
         return digits
     return None
 
+# The id is stored in messages.message_id (unique) and is how re-ingesting an
+# export recognises messages it already has, so its format is fixed: changing
+# the hash or the fields it covers makes every stored message look new. It
+# can't be backfilled either, since the raw sender name isn't kept.
 def _make_message_id(group_name: str, timestamp: datetime, sender: str, body: str) -> str:
     base = f"{group_name}|{timestamp.isoformat()}|{sender}|{body[:100]}".encode("utf-8")
     return hashlib.sha256(base).hexdigest()
 
 
-_WS_RE = _re.compile(r"\s+")
 _PUNCT_RE = _re.compile(r"[\s\-_,.!?:;~*`'\"]+")
 PHONE_BODY_REGEX = _re.compile(r"\+?\d[\d\s\-()]{6,}")
 MONEY_REGEX = _re.compile(r"\$?\b\d[\d,]*(?:\.\d+)?\b")
+# Hash shared by every empty message body
+_EMPTY_CONTENT_HASH = hashlib.sha256(b"\x00").hexdigest()
 
 def compute_content_hash(text: str) -> str:
     """Compute a stable content hash for deduplication.
@@ -82,35 +111,44 @@ def compute_content_hash(text: str) -> str:
     - Trim
     """
     if not text:
-        return hashlib.sha256(b"\x00").hexdigest()
+        return _EMPTY_CONTENT_HASH
     t = text
-    # Remove URLs and phone numbers and money amounts to reduce near-duplicate variance
-    t = URL_REGEX.sub(" ", t)
+    # Remove URLs and phone numbers and money amounts to reduce near-duplicate variance.
+    # Most messages carry no link; the substring test is far cheaper than a
+    # case-insensitive regex scan that finds nothing
+    if "://" in t:
+        t = URL_REGEX.sub(" ", t)
     # t = PHONE_BODY_REGEX.sub(" ", t)
     t = MONEY_REGEX.sub(" ", t)
     t = t.lower()
-    # Normalize punctuation and whitespace
+    # Normalize punctuation and whitespace; _PUNCT_RE covers \s, so this also
+    # collapses whitespace runs
     t = _PUNCT_RE.sub(" ", t)
-    t = _WS_RE.sub(" ", t)
     t = t.strip()
     return hashlib.sha256(t.encode("utf-8")).hexdigest()
 
-def parse_chat_export(lines: Iterator[str], since: Optional[datetime] = None) -> Dict[str, Any]:
+def parse_chat_export(
+    lines: Iterator[str], since: Optional[datetime] = None, workers: int = 1
+) -> Dict[str, Any]:
     """Parse a WhatsApp exported chat text file.
+    Large exports are split across `workers` processes when it is above 1.
     Returns dict with keys:
     - group_name: str
     - messages: List[{
-        message_id, sender_name, sender_phone, timestamp (datetime), body, links: List[str]
+        message_id, sender_name, sender_phone, timestamp (datetime), body
     }]
+    Links are left to the caller (`_extract_links`), which only needs them for
+    the messages it actually stores.
     """
-    # Join all lines into one text for proper multiline regex matching
-    text = ''.join(lines).translate(SPACE_NORMALIZER)
+    # A single process parses the export a piece at a time as `lines` arrives,
+    # so only one piece of the text is held at once; workers split the whole text
+    pieces = _iter_pieces(lines, _PIECE_CHARS)
+    text = _normalize_spaces(next(pieces, ""))
     
     group_name: Optional[str] = None
-    messages: List[Dict[str, Any]] = []
     
     # Extract group name from first line if possible
-    first_line = text.split('\n')[0] if text else ""
+    first_line = text.partition('\n')[0]
     if group_name is None:
         # Pattern: [dd/mm/yy, time] Group Name: message...
         m = re.match(r"^\[(\d{1,2}/\d{1,2}/\d{2,4}),\s*[^\]]+\]\s*(.+?):", first_line)
@@ -119,41 +157,99 @@ def parse_chat_export(lines: Iterator[str], since: Optional[datetime] = None) ->
         else:
             # Fallback group name
             group_name = "Unknown Group"
-    
-    # Find all timestamp matches in the entire text
-    for match in TIMESTAMP_LINE_REGEX.finditer(text):
-        date_str = match.group("date")
-        time_str = match.group("time")
-        sender = match.group("sender").strip()
-        body = match.group("body") or ""
-        
+
+    if workers > 1:
+        text += _normalize_spaces("".join(pieces))
+    if workers > 1 and len(text) >= _PARALLEL_MIN_CHARS:
+        chunks = _split_on_headers(text, workers)
+        with ProcessPoolExecutor(max_workers=len(chunks)) as pool:
+            parts = pool.map(_parse_messages, chunks, repeat(group_name), repeat(since))
+            messages = [msg for part in parts for msg in part]
+    else:
+        messages = _parse_messages(text, group_name, since)
+        for piece in pieces:
+            messages.extend(_parse_messages(_normalize_spaces(piece), group_name, since))
+
+    return {"group_name": group_name or "[UNK]", "messages": messages}
+
+
+def _normalize_spaces(text: str) -> str:
+    # Only copy the (possibly very large) text when there is something to normalize
+    if "\u202F" in text or "\u00A0" in text:
+        return text.translate(SPACE_NORMALIZER)
+    return text
+
+
+def _iter_pieces(lines: Iterator[str], size: int) -> Iterator[str]:
+    """Regroup `lines` into pieces of about `size` characters. A piece is only
+    cut before a line that opens with "[", which no body runs past, so the
+    pieces parse independently."""
+    buf: List[str] = []
+    buffered = 0
+    for line in lines:
+        if buffered >= size and line.startswith("[") and buf[-1].endswith("\n"):
+            yield "".join(buf)
+            buf = []
+            buffered = 0
+        buf.append(line)
+        buffered += len(line)
+    if buf:
+        yield "".join(buf)
+
+
+def _split_on_headers(text: str, n: int) -> List[str]:
+    """Cut `text` into about `n` pieces, each starting on a line that opens with
+    "[". Bodies never run past such a line, so the pieces parse independently."""
+    chunks = []
+    start = 0
+    step = len(text) // n
+    for i in range(1, n):
+        cut = text.find("\n[", max(start, i * step))
+        if cut == -1:
+            break
+        chunks.append(text[start:cut + 1])
+        start = cut + 1
+    chunks.append(text[start:])
+    return chunks
+
+
+def _parse_messages(
+    text: str, group_name: str, since: Optional[datetime]
+) -> List[Dict[str, Any]]:
+    messages: List[Dict[str, Any]] = []
+
+    # Senders repeat across thousands of messages; resolve each one's phone once
+    sender_phones: Dict[str, Optional[str]] = {}
+    find_body_end = _BODY_END.search
+    text_len = len(text)
+
+    # Find all message headers in the entire text
+    for m in LINE_START.finditer(text):
+        *dt_fields, sender = m.groups()
+        sender = sender.strip()
+        start = m.end()
+        end = find_body_end(text, start)
         # Clean up the body - remove extra whitespace but preserve intentional formatting
-        body = body.strip()
-        
-        ts = _try_parse_datetime(date_str, time_str)
+        body = text[start:end.start() if end else text_len].strip()
+
+        ts = _try_parse_datetime(*dt_fields)
 
         if ts is not None and since is not None and ts < since:
             # Skip if timestamp cannot be parsed or is before since
             continue
-            
-        sender_phone = _extract_phone_from_name(sender)
-        
-        current = {
-            "group_name": group_name or "Unknown Group",
+
+        try:
+            sender_phone = sender_phones[sender]
+        except KeyError:
+            sender_phone = sender_phones[sender] = _extract_phone_from_name(sender)
+
+        messages.append({
+            "group_name": group_name,
             "sender_name": sender,
             "sender_phone": sender_phone,
             "timestamp": ts,
             "body": body,
-            "links": _extract_links(body),
-        }
-        
-        # Add message ID
-        current["message_id"] = _make_message_id(
-            current["group_name"], current["timestamp"], current["sender_name"], current["body"]
-        )
-        
-        messages.append(current)
-    
-    print(f'Messages: {len(messages)}\nSample: {messages[1]}')
-    
-    return {"group_name": group_name or "[UNK]", "messages": messages}
\ No newline at end of file
+            "message_id": _make_message_id(group_name, ts, sender, body),
+        })
+
+    return messages
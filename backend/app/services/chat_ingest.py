@@ -1,9 +1,57 @@
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
+from operator import itemgetter
+from sqlalchemy import (
+    JSON, String, Table, any_, bindparam, case, column, func, literal, literal_column, or_, select,
+    table,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, insert as pg_insert
 from sqlalchemy.orm import Session
+from sqlalchemy.sql.expression import TableClause
 from datetime import datetime, timezone
+import functools
+import mmap
+import os
+import uuid
 
+from ..db.bulk import copy_rows
 from ..models.database import User, Group, Message, CanonicalMessage
-from .chat_export_parser import parse_chat_export, compute_content_hash
+from .chat_export_parser import parse_chat_export, compute_content_hash, _extract_links
+
+# Columns loaded with COPY; everything else takes its column default
+_MESSAGE_COPY_COLUMNS = (
+    "id", "message_id", "user_id", "group_id", "content", "timestamp", "message_type",
+    "reactions", "links", "has_media", "media_info", "processed", "content_hash",
+    "first_seen", "last_seen", "occurrence_count",
+)
+_CANONICAL_COPY_COLUMNS = (
+    "content_hash", "content", "first_seen", "last_seen", "occurrence_total", "groups_seen",
+)
+
+
+def _stage_rows(cursor, target: Table, columns: Tuple[str, ...], rows: List[Dict[str, Any]]) -> TableClause:
+    """COPY `rows` into a temp table shaped like `columns` of `target`, dropped
+    at commit. Returns the staging table for use in INSERT ... SELECT."""
+    staging = f"_staging_{target.name}"
+    cursor.execute(
+        f"CREATE TEMP TABLE {staging} ON COMMIT DROP AS "
+        f"SELECT {', '.join(columns)} FROM {target.name} WITH NO DATA"
+    )
+    copy_rows(cursor, target, columns, map(itemgetter(*columns), rows), into=staging)
+    return table(staging, *(column(c) for c in columns))
+
+
+def _read_export(file_path: str) -> str:
+    """Decode an export straight from a read-only mapping of the file, so the
+    decoded text is the only full-size copy held in memory."""
+    with open(file_path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return ""
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            text = str(mm, "utf-8")
+    # Same newline handling as reading the file in text mode
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
 
 class ChatIngestService:
     def __init__(self, db: Session):
@@ -18,11 +66,11 @@ class ChatIngestService:
         """
         results = {"group": None, "inserted": 0, "skipped": 0}
         seen_in_batch = set()
-        seen_canonical_in_batch = set()  # Track canonical content hashes in this batch
-        seen_group_content_in_batch = set()  # Track (group_id, content_hash) combinations in this batch
+        seen_hashes_in_batch = set()  # Track content hashes in this batch; an export is a single group
 
-        with open(file_path, "r", encoding="utf-8") as f:
-            parsed = parse_chat_export(iter(f))
+        # CLI-only path, so parsing may use every core; the upload endpoint stays
+        # single-process
+        parsed = parse_chat_export(iter([_read_export(file_path)]), workers=os.cpu_count() or 1)
 
         group_name = parsed["group_name"]
         group = self.db.query(Group).filter(Group.group_name == group_name).first()
@@ -43,111 +91,156 @@ class ChatIngestService:
         if since and since.tzinfo is None:
             since = since.replace(tzinfo=timezone.utc)
 
+        messages = []
         for msg in parsed["messages"]:
-            timestamp: datetime = msg["timestamp"]
-            if since and timestamp <= since:
+            if since and msg["timestamp"] <= since:
                 results["skipped"] += 1
-                continue
+            else:
+                messages.append(msg)
 
-            mid = msg["message_id"]
-            if mid in seen_in_batch:
-                results["skipped"] += 1
-                continue
+        # Short replies ("ok", "thanks") and forwards repeat throughout an export;
+        # hash each distinct body once. Scoped to this file so the cache is freed with it
+        content_hash_of = functools.cache(compute_content_hash)
+        hashes = [content_hash_of(m["body"]) for m in messages]
+
+        # Prefetch the ids and users the loop needs in two queries instead of
+        # probing the DB several times per message
+        mids = [m["message_id"] for m in messages]
+        phones = {m["sender_phone"] for m in messages if m.get("sender_phone")}
+        names = {m["sender_name"] for m in messages}
+
+        existing_mids = set(self.db.scalars(
+            select(Message.message_id).where(
+                Message.message_id == any_(bindparam("mids", mids, type_=ARRAY(String)))
+            )
+        ))
+        user_by_phone = {}
+        user_by_name = {}
+        for u in self.db.scalars(
+            select(User).where(or_(User.phone_number.in_(phones), User.display_name.in_(names)))
+        ):
+            if u.phone_number:
+                user_by_phone.setdefault(u.phone_number, u)
+            user_by_name.setdefault(u.display_name, u)
 
-            existing = self.db.query(Message).filter(Message.message_id == mid).first()
-            if existing:
+        new_users = []
+        message_rows = []
+
+        for msg, content_hash in zip(messages, hashes):
+            timestamp: datetime = msg["timestamp"]
+            mid = msg["message_id"]
+            if mid in seen_in_batch or mid in existing_mids:
                 results["skipped"] += 1
                 continue
 
             # Upsert user
             user = None
             if msg.get("sender_phone"):
-                user = self.db.query(User).filter(User.phone_number == msg["sender_phone"]).first()
+                user = user_by_phone.get(msg["sender_phone"])
             if not user:
                 # fallback by display name
-                user = self.db.query(User).filter(User.display_name == msg["sender_name"]).first()
+                user = user_by_name.get(msg["sender_name"])
             if not user:
                 user = User(
+                    id=uuid.uuid4(),
                     unique_id=f"export_user::{msg.get('sender_phone') or msg['sender_name']}",
                     phone_number=msg.get("sender_phone"),
                     display_name=msg["sender_name"],
                 )
-                self.db.add(user)
-                self.db.flush()
-
-            # Deduplicate by normalized content hash per group
-            content_hash = compute_content_hash(msg["body"])
-            group_content_key = (group.id, content_hash)
-            
-            # Check if we've already seen this (group_id, content_hash) in this batch
-            if group_content_key in seen_group_content_in_batch:
-                results["skipped"] += 1
-                continue
-                
-            # Check if this (group_id, content_hash) already exists in DB
-            dup = self.db.query(Message).filter(
-                Message.group_id == group.id,
-                Message.content_hash == content_hash,
-            ).first()
-            if dup:
-                dup.last_seen = timestamp
-                dup.occurrence_count = (dup.occurrence_count or 1) + 1
+                new_users.append(user)
+                if user.phone_number:
+                    user_by_phone[user.phone_number] = user
+                user_by_name.setdefault(user.display_name, user)
+
+            # Dedup content hash per group. An export is one group, so the hash alone
+            # identifies its (group_id, content_hash) key; duplicates of rows already
+            # in the DB are resolved by the upsert below
+            if content_hash in seen_hashes_in_batch:
                 results["skipped"] += 1
                 continue
 
-            record = Message(
-                message_id=mid,
-                user_id=user.id,
-                group_id=group.id,
-                content=msg["body"],
-                timestamp=timestamp,
-                message_type="text",
-                reactions=None,
-                links=msg.get("links", []),
-                has_media=False,
-                media_info=None,
-                processed=False,
-                content_hash=content_hash,
-                first_seen=timestamp,
-                last_seen=timestamp,
-                occurrence_count=1,
+            message_rows.append({
+                "id": uuid.uuid4(),
+                "message_id": mid,
+                "user_id": user.id,
+                "group_id": group.id,
+                "content": msg["body"],
+                "timestamp": timestamp,
+                "message_type": "text",
+                "reactions": JSON.NULL,
+                "links": _extract_links(msg["body"]),
+                "has_media": False,
+                "media_info": JSON.NULL,
+                "processed": False,
+                "content_hash": content_hash,
+                "first_seen": timestamp,
+                "last_seen": timestamp,
+                "occurrence_count": 1,
+            })
+            seen_in_batch.add(mid)
+            seen_hashes_in_batch.add(content_hash)
+
+        # Users first so the messages' user_id foreign keys resolve
+        self.db.add_all(new_users)
+        self.db.flush()
+
+        if message_rows:
+            # COPY the new rows into per-transaction staging tables, then upsert from
+            # there: COPY streams rows without per-statement parsing or bind
+            # overhead, and ON CONFLICT still decides insert vs occurrence bump
+            cursor = self.db.connection().connection.cursor()
+            staged_messages = _stage_rows(cursor, Message.__table__, _MESSAGE_COPY_COLUMNS, message_rows)
+
+            # Insert new messages; an existing (group_id, content_hash) just bumps its
+            # occurrence metadata. `xmax = 0` tells freshly inserted rows from updated ones.
+            stmt = pg_insert(Message).from_select(_MESSAGE_COPY_COLUMNS, select(staged_messages))
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[Message.group_id, Message.content_hash],
+                index_where=Message.content_hash.isnot(None),
+                set_={
+                    "last_seen": func.coalesce(stmt.excluded.last_seen, func.now()),
+                    "occurrence_count": func.coalesce(Message.occurrence_count, 1) + 1,
+                },
+            ).returning(Message.content_hash, literal_column("xmax = 0"))
+            inserted_hashes = {
+                content_hash for content_hash, was_inserted in self.db.execute(stmt) if was_inserted
+            }
+            results["inserted"] = len(inserted_hashes)
+            results["skipped"] += len(message_rows) - len(inserted_hashes)
+
+            canonical_rows = [
+                {
+                    "content_hash": row["content_hash"],
+                    "content": row["content"],
+                    "first_seen": row["timestamp"],
+                    "last_seen": row["timestamp"],
+                    "occurrence_total": 1,
+                    "groups_seen": [group.group_name],
+                }
+                for row in message_rows
+                if row["content_hash"] in inserted_hashes
+            ]
+            staged_canonicals = _stage_rows(
+                cursor, CanonicalMessage.__table__, _CANONICAL_COPY_COLUMNS, canonical_rows
             )
-            self.db.add(record)
             # Upsert canonical across all groups
-            if content_hash in seen_canonical_in_batch:
-                # Already processed this content hash in this batch, just update existing canonical
-                canon = self.db.query(CanonicalMessage).filter(CanonicalMessage.content_hash == content_hash).first()
-                if canon:
-                    canon.last_seen = timestamp
-                    canon.occurrence_total = (canon.occurrence_total or 1) + 1
-                    groups = set(canon.groups_seen or [])
-                    groups.add(group.group_name)
-                    canon.groups_seen = list(groups)
-            else:
-                # First time seeing this content hash in this batch
-                canon = self.db.query(CanonicalMessage).filter(CanonicalMessage.content_hash == content_hash).first()
-                if canon:
-                    # Update existing canonical from previous batches
-                    canon.last_seen = timestamp
-                    canon.occurrence_total = (canon.occurrence_total or 1) + 1
-                    groups = set(canon.groups_seen or [])
-                    groups.add(group.group_name)
-                    canon.groups_seen = list(groups)
-                else:
-                    # Create new canonical entry
-                    canon = CanonicalMessage(
-                        content_hash=content_hash,
-                        content=msg["body"],
-                        first_seen=timestamp,
-                        last_seen=timestamp,
-                        occurrence_total=1,
-                        groups_seen=[group.group_name],
-                    )
-                    self.db.add(canon)
-                seen_canonical_in_batch.add(content_hash)
-            results["inserted"] += 1
-            seen_in_batch.add(mid)
-            seen_group_content_in_batch.add(group_content_key)
+            stmt = pg_insert(CanonicalMessage).from_select(_CANONICAL_COPY_COLUMNS, select(staged_canonicals))
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[CanonicalMessage.content_hash],
+                set_={
+                    "last_seen": stmt.excluded.last_seen,
+                    "occurrence_total": func.coalesce(CanonicalMessage.occurrence_total, 1) + 1,
+                    "groups_seen": case(
+                        (
+                            literal(group.group_name) == func.any(CanonicalMessage.groups_seen),
+                            CanonicalMessage.groups_seen,
+                        ),
+                        else_=func.array_append(CanonicalMessage.groups_seen, group.group_name),
+                    ),
+                },
+            )
+            self.db.execute(stmt)
+            cursor.close()
 
         self.db.commit()
         return results
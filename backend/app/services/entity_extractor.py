@@ -1,15 +1,17 @@
 import re
 from typing import Optional, Dict, Any, List
 from datetime import datetime
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..models.database import Message, ItemForSale, Apartment, User
 from .llm_extractor import LLMExtractor
-from .chat_export_parser import _extract_links  # reuse link extractor
+from .chat_export_parser import _extract_links, _PHONE_SEPARATORS  # reuse link extractor
 
 PRICE_REGEX = re.compile(r"(?:\$\s*)?(\d{2,5})(?:\.\d{1,2})?", re.IGNORECASE)
 PHONE_REGEX = re.compile(r"\+?\d[\d\s\-()]{6,}")
-EMAIL_REGEX = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
+# Only tried at the start of a local-part run (see llm_extractor.EMAIL_REGEX)
+EMAIL_REGEX = re.compile(r"(?<![A-Za-z0-9._%+-])[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
 
 ITEM_KEYWORDS = [
     "for sale", "selling", "price", "available", "condition", "pickup",
@@ -30,9 +32,31 @@ CATEGORY_KEYWORDS = {
 }
 
 
-def _contains_any(text: str, keywords: List[str]) -> bool:
-    t = text.lower()
-    return any(k in t for k in keywords)
+def _keyword_re(keywords: List[str]) -> "re.Pattern[str]":
+    # Matched against lowercased text: re.IGNORECASE makes the alternation
+    # several times slower on messages with no hit
+    return re.compile("|".join(re.escape(k) for k in keywords))
+
+
+ITEM_RE = _keyword_re(ITEM_KEYWORDS)
+HOUSING_RE = _keyword_re(HOUSING_KEYWORDS)
+CATEGORY_RES = {cat: _keyword_re(words) for cat, words in CATEGORY_KEYWORDS.items()}
+
+
+# Messages shorter than this with no digits, contact details, links or listing
+# keywords are treated as chatter
+_CHATTER_MAX_LEN = 40
+
+
+def _is_chatter(text: str) -> bool:
+    """Cheap pre-filter for messages like "lol" or "thanks!" that can't hold a
+    listing, so they skip the LLM and the extraction regexes."""
+    if len(text) >= _CHATTER_MAX_LEN or "@" in text or "http" in text:
+        return False
+    if any(c.isdigit() for c in text):
+        return False
+    lowered = text.lower()
+    return not (HOUSING_RE.search(lowered) or ITEM_RE.search(lowered))
 
 
 def _extract_price(text: str) -> Optional[float]:
@@ -49,10 +73,12 @@ def _extract_phone(text: str) -> Optional[str]:
     m = PHONE_REGEX.search(text)
     if not m:
         return None
-    return re.sub(r"[^\d+]", "", m.group(0))
+    return m.group(0).translate(_PHONE_SEPARATORS)
 
 
 def _extract_email(text: str) -> Optional[str]:
+    if "@" not in text:
+        return None
     m = EMAIL_REGEX.search(text)
     if not m:
         return None
@@ -61,12 +87,18 @@ def _extract_email(text: str) -> Optional[str]:
 
 def _infer_category(text: str) -> str:
     t = text.lower()
-    for cat, words in CATEGORY_KEYWORDS.items():
-        if any(w in t for w in words):
+    for cat, pattern in CATEGORY_RES.items():
+        if pattern.search(t):
             return cat
     return "other"
 
 
+def _message_links(message: Message) -> List[str]:
+    if message.links is not None:
+        return message.links
+    return _extract_links(message.content or "")
+
+
 def _infer_listing_type(text: str) -> str:
     t = text.lower()
     if "sublet" in t:
@@ -82,24 +114,24 @@ class EntityExtractor:
     """Processes DB messages into ItemForSale/Apartment entities.
     Uses LLM if configured; falls back to regex-based heuristics.
     """
-    def __init__(self, db: Session, use_llm: bool = False):
+    def __init__(self, db: AsyncSession, use_llm: bool = False):
         self.db = db
         self.use_llm = use_llm
         self.llm = LLMExtractor() if use_llm else None
 
     async def process_unprocessed(self, limit: int = 200) -> Dict[str, int]:
         q = (
-            self.db.query(Message)
-            .filter(Message.processed == False)  # noqa: E712
+            select(Message)
+            .where(Message.processed == False)  # noqa: E712
             .order_by(Message.timestamp.asc())
             .limit(limit)
         )
-        messages: List[Message] = q.all()
+        messages: List[Message] = (await self.db.execute(q)).scalars().all()
         stats = {"messages": 0, "items": 0, "apartments": 0}
 
         for msg in messages:
             content = (msg.content or "").strip()
-            if not content:
+            if not content or _is_chatter(content):
                 msg.processed = True
                 stats["messages"] += 1
                 continue
@@ -116,9 +148,10 @@ class EntityExtractor:
 
             # Heuristic categorization if no LLM or failure
             if not category:
-                if _contains_any(content, HOUSING_KEYWORDS):
+                lowered = content.lower()
+                if HOUSING_RE.search(lowered):
                     category = "APARTMENT_LISTING"
-                elif _contains_any(content, ITEM_KEYWORDS):
+                elif ITEM_RE.search(lowered):
                     category = "ITEM_FOR_SALE"
                 else:
                     category = "GENERAL"
@@ -168,7 +201,7 @@ class EntityExtractor:
             msg.processed = True
             stats["messages"] += 1
 
-        self.db.commit()
+        await self.db.commit()
         return stats
 
     async def _create_item(self, message: Message, data: Dict[str, Any]) -> None:
@@ -177,10 +210,11 @@ class EntityExtractor:
             contact_info["phone"] = data["contact_phone"]
         if data.get("contact_email"):
             contact_info["email"] = data["contact_email"]
-        # Links as fallback contact
-        links = _extract_links(message.content or "")
-        if not contact_info and links:
-            contact_info["link"] = links[0]
+        # Links as fallback contact; ingest already stored them on the message
+        if not contact_info:
+            links = _message_links(message)
+            if links:
+                contact_info["link"] = links[0]
 
         item = ItemForSale(
             item_id=f"item::{message.message_id}",
@@ -204,9 +238,10 @@ class EntityExtractor:
             contact_info["phone"] = data["contact_phone"]
         if data.get("contact_email"):
             contact_info["email"] = data["contact_email"]
-        links = _extract_links(message.content or "")
-        if not contact_info and links:
-            contact_info["link"] = links[0]
+        if not contact_info:
+            links = _message_links(message)
+            if links:
+                contact_info["link"] = links[0]
 
         apt = Apartment(
             listing_id=f"apt::{message.message_id}",
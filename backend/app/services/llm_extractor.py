@@ -1,21 +1,70 @@
 import openai
 import asyncio
-import json
+import functools
 import re
+import weakref
 from typing import Dict, List, Optional, Any
 from anthropic import Anthropic
 from ..core.config import settings
-from ..schemas.extraction import CategorizationResult, SalesExtraction, HousingExtraction
+from ..schemas.extraction import (
+    BatchCategorizationResult, CategorizationResult, SalesExtraction, HousingExtraction,
+)
+from .chat_export_parser import _PHONE_SEPARATORS
+from .rate_limiter import RateLimiter
 
-EMAIL_REGEX = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
+# The lookbehind pins each attempt to the start of a run of local-part
+# characters; without it a long run with no valid address is rescanned from
+# every offset, which is quadratic in the run length
+EMAIL_REGEX = re.compile(r"(?<![A-Za-z0-9._%+-])[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
 PHONE_REGEX = re.compile(r"\+?\d[\d\s\-()]{6,}")
+_CTRL_RE = re.compile(r'[\x00-\x08\x0B\x0C\x0E-\x1F\x7F-\x9F]')
+
+@functools.lru_cache(maxsize=None)
+def _response_format(schema: Any) -> Dict[str, Any]:
+    # Schemas are fixed classes; build each one's response_format once, not per call
+    return {
+        "type": "json_schema",
+        "json_schema": {"name": schema.__name__, "schema": schema.model_json_schema()},
+    }
+
+
+# One OpenAI client, and so one connection pool, per event loop, shared by every
+# extractor; an httpx async pool can't be reused once its loop has closed
+_openai_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, openai.AsyncOpenAI]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _openai_client() -> openai.AsyncOpenAI:
+    loop = asyncio.get_running_loop()
+    client = _openai_clients.get(loop)
+    if client is None:
+        client = _openai_clients[loop] = openai.AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+    return client
+
+
+@functools.lru_cache(maxsize=None)
+def _anthropic_client() -> Anthropic:
+    return Anthropic(api_key=settings.ANTHROPIC_API_KEY)
+
+
+# Shared by every extractor in the process, since the limits are per account
+_limiter = RateLimiter(settings.LLM_RPM, settings.LLM_TPM)
+
 
 class LLMExtractor:
     def __init__(self):
-        self.openai_client = openai.OpenAI(api_key=settings.OPENAI_API_KEY)
-        self.anthropic_client = Anthropic(api_key=settings.ANTHROPIC_API_KEY)
         self.rate_limit_delay = settings.LLM_RATE_LIMIT_DELAY
         self.max_retries = settings.MAX_RETRIES
+
+    @property
+    def openai_client(self) -> openai.AsyncOpenAI:
+        # Async client so concurrent calls don't block the event loop
+        return _openai_client()
+
+    @property
+    def anthropic_client(self) -> Anthropic:
+        return _anthropic_client()
     
     async def categorize_message(self, message_text: str) -> str:
         """Categorize a university group chat message using structured output."""
@@ -33,6 +82,36 @@ class LLMExtractor:
             print(f"Error categorizing message: {e}")
             return "GENERAL"
     
+    async def categorize_batch(self, messages: List[str]) -> List[str]:
+        """Categorize several messages with one structured-output call. Messages the
+        response leaves out, or all of them if the call fails, are categorized
+        one at a time."""
+        if not messages:
+            return []
+        system = (
+            "You classify university group chat messages. Each message starts with "
+            "its index in brackets. Return the category of every message with its index."
+        )
+        user = "\n\n".join(f"[{i}] Message: {text}" for i, text in enumerate(messages))
+        categories: Dict[int, str] = {}
+        try:
+            response = await self._call_openai_structured(
+                system=system,
+                user=user,
+                schema=BatchCategorizationResult,
+                max_tokens=20 * len(messages),
+            )
+            categories = {
+                r.index: r.category for r in response.results if 0 <= r.index < len(messages)
+            }
+        except Exception as e:
+            print(f"Error categorizing batch: {e}")
+        missing = [i for i in range(len(messages)) if i not in categories]
+        if missing:
+            fallback = await self.batch_categorize([messages[i] for i in missing])
+            categories.update(zip(missing, fallback))
+        return [categories[i] for i in range(len(messages))]
+    
     async def extract_item_data(self, message_text: str) -> Optional[Dict[str, Any]]:
         """Extract structured item-for-sale data using structured outputs."""
         system = (
@@ -52,7 +131,7 @@ class LLMExtractor:
             if not data.get("contact_phone"):
                 phone_match = PHONE_REGEX.search(message_text)
                 if phone_match:
-                    data["contact_phone"] = re.sub(r"[^\d+]", "", phone_match.group(0))
+                    data["contact_phone"] = phone_match.group(0).translate(_PHONE_SEPARATORS)
             if not data.get("contact_email"):
                 email_match = EMAIL_REGEX.search(message_text)
                 if email_match:
@@ -80,7 +159,7 @@ class LLMExtractor:
             if not data.get("contact_phone"):
                 phone_match = PHONE_REGEX.search(message_text)
                 if phone_match:
-                    data["contact_phone"] = re.sub(r"[^\d+]", "", phone_match.group(0))
+                    data["contact_phone"] = phone_match.group(0).translate(_PHONE_SEPARATORS)
             if not data.get("contact_email"):
                 email_match = EMAIL_REGEX.search(message_text)
                 if email_match:
@@ -91,19 +170,26 @@ class LLMExtractor:
             return None
     
     async def batch_categorize(self, messages: List[str]) -> List[str]:
-        results = []
-        for message in messages:
-            result = await self.categorize_message(message)
-            results.append(result)
-            await asyncio.sleep(self.rate_limit_delay)
-        return results
+        # Up to LLM_MAX_CONCURRENCY requests in flight; rate-limit errors are
+        # retried with backoff in _call_openai_structured
+        sem = asyncio.Semaphore(settings.LLM_MAX_CONCURRENCY)
+
+        async def one(message: str) -> str:
+            async with sem:
+                return await self.categorize_message(message)
+
+        return await asyncio.gather(*(one(m) for m in messages))
     
     async def _call_openai_structured(self, system: str, user: str, schema: Any, max_tokens: int = 300):
         """Call OpenAI with response_format schema for structured outputs, then validate via Pydantic."""
-        json_schema = schema.model_json_schema()
+        response_format = _response_format(schema)
+        # About 4 characters per token; OpenAI counts max_tokens against the TPM
+        # limit up front
+        est_tokens = (len(system) + len(user)) // 4 + max_tokens
         for attempt in range(self.max_retries):
             try:
-                completion = self.openai_client.chat.completions.create(
+                await _limiter.acquire(est_tokens)
+                completion = await self.openai_client.chat.completions.create(
                     model="gpt-4o-mini",
                     messages=[
                         {"role": "system", "content": system},
@@ -111,16 +197,15 @@ class LLMExtractor:
                     ],
                     temperature=0.1,
                     max_tokens=max_tokens,
-                    response_format={"type": "json_schema", "json_schema": {"name": schema.__name__, "schema": json_schema}},
+                    response_format=response_format,
                 )
                 content = completion.choices[0].message.content
-                if isinstance(content, str):
-                    parsed_json = json.loads(content)
-                else:
+                if not isinstance(content, str):
                     # Some SDK versions may return list of parts
-                    text_parts = [p.get("text", "") for p in content if isinstance(p, dict)]
-                    parsed_json = json.loads("".join(text_parts))
-                return schema.model_validate(parsed_json)
+                    content = "".join(p.get("text", "") for p in content if isinstance(p, dict))
+                # Parse and validate in one step inside pydantic-core, without an
+                # intermediate dict
+                return schema.model_validate_json(content)
             except Exception as e:
                 if attempt == self.max_retries - 1:
                     raise e
@@ -131,6 +216,6 @@ class LLMExtractor:
     def _sanitize_json_string(self, text: str) -> str:
         """Sanitize a string to make it valid JSON."""
         # Remove or replace common problematic control characters
-        sanitized = re.sub(r'[\x00-\x08\x0B\x0C\x0E-\x1F\x7F-\x9F]', '', text)
+        sanitized = _CTRL_RE.sub('', text)
         sanitized = sanitized.replace('\r\n', '\n').replace('\r', '\n')
         return sanitized
\ No newline at end of file
@@ -1,19 +1,180 @@
 import asyncio
+import functools
+import hashlib
 import json
-from typing import List, Dict, Any, Optional
+import logging
+import orjson
+import re
+import secrets
+import time
+from itertools import islice
+from operator import itemgetter
+from typing import (
+    List, Dict, Any, Optional, Tuple, AsyncIterable, AsyncIterator, Iterable, Sized, Union,
+)
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import JSON, func, literal_column, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
 import uuid
 
+from ..db.bulk import copy_rows
 from ..models.database import User, Group, Message, ItemForSale, Apartment, ProcessingLog
+from ..schemas.scraped import MemberIn, MessageIn
 from .llm_extractor import LLMExtractor
 from ..core.config import settings
 
+
+
+class SamplingFilter(logging.Filter):
+    """Let through at most one record per `interval` seconds for each message
+    template, so a batch where every row fails doesn't log every row."""
+
+    def __init__(self, interval: float = 1.0):
+        super().__init__()
+        self.interval = interval
+        self._last: Dict[Any, float] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        now = time.monotonic()
+        key = (record.msg, record.levelno)
+        if now - self._last.get(key, float("-inf")) < self.interval:
+            return False
+        self._last[key] = now
+        return True
+
+
+logger = logging.getLogger(__name__)
+logger.addFilter(SamplingFilter())
+
+# Scrapes larger than this (historical backfills) load new messages with COPY
+_COPY_THRESHOLD = 500
+_MESSAGE_COPY_COLUMNS = (
+    "id", "message_id", "user_id", "group_id", "content", "timestamp", "message_type",
+    "reactions", "links", "has_media", "media_info", "processed", "extracted_entities",
+    "occurrence_count",
+)
+
+# Words and symbols any sale or housing post is bound to contain. Messages with
+# none of them ("ok", "thanks", greetings, questions) are GENERAL without
+# asking the LLM, so the list errs on the side of escalating
+LISTING_HINTS = re.compile(
+    r"[$€£₹]|\b(?:sell\w*|sale|sold|buy\w*|price\w*|obo|cost\w*|brand new|pick ?up|"
+    r"rent\w*|sublet\w*|sublease\w*|lease\w*|apartment\w*|apt|studio|room\w*|bed\w*|"
+    r"bath\w*|bhk|housing|move[- ]?in|furnish\w*|available|\d+ ?(?:k|usd|dollars|bucks))\b",
+    re.I,
+)
+
+# Extraction fields read per listing, with the defaults the models fall back to
+# when a key is missing. One itemgetter call replaces a .get() per field
+_ITEM_DEFAULTS = {
+    "title": "", "description": "", "price": None, "category": "other", "condition": None,
+    "location": None, "contact_phone": None, "contact_email": None,
+}
+_get_item_fields = itemgetter(*_ITEM_DEFAULTS)
+_APARTMENT_DEFAULTS = {
+    "listing_type": "", "address": None, "price": None, "bedrooms": None, "bathrooms": None,
+    "amenities": [], "lease_duration": None, "key_features": [], "utilities_included": None,
+    "furnished": None, "pet_friendly": None, "available_from": None, "available_until": None,
+    "contact_phone": None, "contact_email": None,
+}
+_get_apartment_fields = itemgetter(*_APARTMENT_DEFAULTS)
+
+
+def _contact_info(phone: Any, email: Any, links: Optional[List[str]]) -> Dict[str, Any]:
+    # Phone and email from the extraction, else the message's first link
+    contact_info: Dict[str, Any] = {}
+    if phone:
+        contact_info["phone"] = phone
+    if email:
+        contact_info["email"] = email
+    if not contact_info and links:
+        contact_info["link"] = links[0]
+    return contact_info
+
+
+_members_adapter = TypeAdapter(List[MemberIn])
+_messages_adapter = TypeAdapter(List[MessageIn])
+
+
+def _validate_rows(adapter: TypeAdapter, rows: List[Any], kind: str) -> List[Any]:
+    """Validate `rows` with `adapter` in one call, dropping malformed ones with
+    a single summary warning rather than an exception per row."""
+    try:
+        return adapter.validate_python(rows)
+    except ValidationError as e:
+        errors = e.errors()
+    # A list's errors are located by index; rows are independent, so the rest
+    # validate cleanly on a second pass
+    bad = {error["loc"][0] for error in errors}
+    # `kind` goes into the template itself: SamplingFilter keys on the template,
+    # so members and messages are sampled separately
+    logger.warning(f"Skipped %d malformed {kind}, first: %s", len(bad), errors[0]["msg"])
+    return adapter.validate_python([row for i, row in enumerate(rows) if i not in bad])
+
+
+def _item_extraction(item: ItemForSale) -> Dict[str, Any]:
+    # An items_for_sale row back in the shape extract_item_data returns
+    contact_info = item.contact_info or {}
+    return {
+        "title": item.title, "description": item.description, "price": item.price,
+        "category": item.category, "condition": item.condition, "location": item.location,
+        "contact_phone": contact_info.get("phone"), "contact_email": contact_info.get("email"),
+    }
+
+
+def _apartment_extraction(apartment: Apartment) -> Dict[str, Any]:
+    # An apartments row back in the shape extract_housing_data returns
+    contact_info = apartment.contact_info or {}
+    return {
+        "listing_type": apartment.listing_type, "address": apartment.address,
+        "price": apartment.price_per_month, "bedrooms": apartment.bedrooms,
+        "bathrooms": apartment.bathrooms, "amenities": apartment.amenities or [],
+        "lease_duration": apartment.lease_duration, "key_features": apartment.key_features or [],
+        "utilities_included": apartment.utilities_included, "furnished": apartment.furnished,
+        "pet_friendly": apartment.pet_friendly, "available_from": apartment.available_from,
+        "available_until": apartment.available_until,
+        "contact_phone": contact_info.get("phone"), "contact_email": contact_info.get("email"),
+    }
+
+
+@functools.lru_cache(maxsize=4096)
+def _parse_iso(value: str) -> Optional[datetime]:
+    # Listings share a handful of move-in dates; parse each string once
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
+async def _batched(
+    messages: Union[Iterable[Dict[str, Any]], AsyncIterable[Dict[str, Any]]], size: int
+) -> AsyncIterator[List[Dict[str, Any]]]:
+    """Yield `messages` in lists of up to `size`, reading one batch at a time."""
+    if not isinstance(messages, AsyncIterable):
+        it = iter(messages)
+        while batch := list(islice(it, size)):
+            yield batch
+        return
+    batch = []
+    async for message in messages:
+        batch.append(message)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
 class MessageProcessor:
     def __init__(self, db: Session):
         self.db = db
         self.llm_extractor = LLMExtractor()
     
+    async def process_scraped_data_raw(self, blob: Union[bytes, str]) -> Dict[str, Any]:
+        """Process scraped WhatsApp group data given as the scraper's JSON."""
+        return await self.process_scraped_data(orjson.loads(blob))
+
     async def process_scraped_data(self, scraped_data: Dict[str, Any]) -> Dict[str, Any]:
         """Process scraped WhatsApp group data."""
         results = {
@@ -37,7 +198,7 @@ class MessageProcessor:
             results["users_updated"] = user_stats["updated"]
             
             # Process messages
-            message_stats = await self._process_messages(scraped_data["messages"], group.id)
+            message_stats = await self._process_messages(scraped_data["messages"], group)
             results["messages_processed"] = message_stats["processed"]
             results["items_extracted"] = message_stats["items_extracted"]
             results["apartments_extracted"] = message_stats["apartments_extracted"]
@@ -52,71 +213,74 @@ class MessageProcessor:
     
     async def _process_group_info(self, group_info: Dict[str, Any]) -> Group:
         """Process and store group information."""
-        existing_group = self.db.query(Group).filter(
-            Group.group_id == group_info["id"]
-        ).first()
-        
-        if existing_group:
-            # Update existing group
-            existing_group.group_name = group_info["name"]
-            existing_group.member_count = group_info["participantCount"]
-            existing_group.last_scraped = datetime.utcnow()
-            return existing_group
-        else:
-            # Create new group
-            new_group = Group(
-                group_id=group_info["id"],
-                group_name=group_info["name"],
-                university=group_info.get("university", "Unknown"),
-                category=",".join(group_info.get("categories", ["general"])),
-                member_count=group_info["participantCount"],
-                last_scraped=datetime.utcnow()
-            )
-            self.db.add(new_group)
-            self.db.flush()  # Get ID
-            return new_group
+        # Create the group, or update an existing one's name and member count, in
+        # one statement; RETURNING hands back the row as a Group
+        stmt = pg_insert(Group).values(
+            group_id=group_info["id"],
+            group_name=group_info["name"],
+            university=group_info.get("university", "Unknown"),
+            category=",".join(group_info.get("categories", ["general"])),
+            member_count=group_info["participantCount"],
+            last_scraped=datetime.utcnow(),
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Group.group_id],
+            set_={
+                "group_name": stmt.excluded.group_name,
+                "member_count": stmt.excluded.member_count,
+                "last_scraped": stmt.excluded.last_scraped,
+            },
+        ).returning(Group)
+        return self.db.scalars(stmt, execution_options={"populate_existing": True}).one()
     
     async def _process_members(self, members: List[Dict[str, Any]]) -> Dict[str, int]:
         """Process group members and create/update users."""
         stats = {"created": 0, "updated": 0}
+        users: Dict[str, Dict[str, Any]] = {}
+        # Members without a phone number are dropped here
+        valid = _validate_rows(_members_adapter, list(members), "members")
         
-        for member_data in members:
-            try:
-                phone = member_data.get("phone", "").strip()
-                if not phone:
-                    continue
-                
-                # Check if user exists
-                existing_user = self.db.query(User).filter(
-                    User.phone_number == phone
-                ).first()
-                
-                if existing_user:
-                    # Update existing user
-                    existing_user.display_name = member_data.get("name", "Unknown")
-                    existing_user.last_active_date = datetime.utcnow()
-                    stats["updated"] += 1
-                else:
-                    # Create new user
-                    new_user = User(
-                        unique_id=f"user_{uuid.uuid4().hex[:12]}",
-                        phone_number=phone,
-                        display_name=member_data.get("name", "Unknown"),
-                        groups_joined=[],  # Will be updated when processing messages
-                        first_seen_date=datetime.utcnow(),
-                        last_active_date=datetime.utcnow()
-                    )
-                    self.db.add(new_user)
-                    stats["created"] += 1
-                    
-            except Exception as e:
-                print(f"Error processing member {member_data}: {e}")
-                continue
+        for member in valid:
+            if member.phone in users:
+                # Listed twice; the later entry wins, as when each was saved in turn
+                users[member.phone]["display_name"] = member.name
+                users[member.phone]["last_active_date"] = datetime.utcnow()
+            else:
+                users[member.phone] = {
+                    "unique_id": f"user_{secrets.token_hex(6)}",
+                    "phone_number": member.phone,
+                    "display_name": member.name,
+                    "groups_joined": [],  # Will be updated when processing messages
+                    "first_seen_date": datetime.utcnow(),
+                    "last_active_date": datetime.utcnow(),
+                }
+
+        if users:
+            # Create or update every member in one multi-row upsert; existing users
+            # only take the new name and activity time. `xmax = 0` tells freshly
+            # inserted rows from updated ones
+            stmt = pg_insert(User)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[User.phone_number],
+                set_={
+                    "display_name": stmt.excluded.display_name,
+                    "last_active_date": stmt.excluded.last_active_date,
+                },
+            ).returning(literal_column("xmax = 0"))
+            stats["created"] = sum(
+                inserted for (inserted,) in self.db.execute(stmt, list(users.values()))
+            )
+        stats["updated"] = len(valid) - stats["created"]
         
         return stats
     
-    async def _process_messages(self, messages: List[Dict[str, Any]], group_id: str) -> Dict[str, int]:
-        """Process messages and extract items/apartments."""
+    async def _process_messages(
+        self,
+        messages: Union[Iterable[Dict[str, Any]], AsyncIterable[Dict[str, Any]]],
+        group: Group,
+    ) -> Dict[str, int]:
+        """Process messages and extract items/apartments. `messages` may be a list
+        or a (async) stream; only one batch of it is held at a time."""
         stats = {
             "processed": 0,
             "items_extracted": 0,
@@ -125,201 +289,436 @@ class MessageProcessor:
         
         # Process messages in batches to avoid overwhelming the LLM APIs
         batch_size = settings.PROCESSING_BATCH_SIZE
+        # Up to LLM_MAX_CONCURRENCY LLM requests in flight across a batch
+        sem = asyncio.Semaphore(settings.LLM_MAX_CONCURRENCY)
+
+        # Messages categorized per LLM call
+        categorize_size = settings.LLM_CATEGORIZE_BATCH_SIZE
+
+        async def categorize(contents: List[str]) -> List[str]:
+            async with sem:
+                return await self.llm_extractor.categorize_batch(contents)
+
+        async def extract(content: str, category: str) -> Dict[str, Any]:
+            async with sem:
+                return await self._extract_for_category(content, category)
+
+        async def extract_batch(contents: List[str]) -> List[Any]:
+            # Categorize the batch's new contents LLM_CATEGORIZE_BATCH_SIZE per call,
+            # then extract only the listings
+            new_contents = list(dict.fromkeys(c for c in contents if c not in extraction_tasks))
+            chunks = [
+                new_contents[j:j + categorize_size]
+                for j in range(0, len(new_contents), categorize_size)
+            ]
+            for chunk, categories in zip(chunks, await asyncio.gather(*map(categorize, chunks))):
+                for content, category in zip(chunk, categories):
+                    extraction_tasks[content] = asyncio.ensure_future(extract(content, category))
+            return await asyncio.gather(
+                *(extraction_tasks[c] for c in contents), return_exceptions=True
+            )
+
+        # Reposts and forwards repeat the same text, so each distinct content goes
+        # to the LLM once per run; repeats, even within one batch, share its task.
+        # Keyed on the exact text the LLM sees, since extractions (prices, titles)
+        # depend on it
+        extraction_tasks: Dict[str, "asyncio.Future[Dict[str, Any]]"] = {}
+        # Authors by phone, filled a batch at a time and shared across batches
+        users_by_phone: Dict[str, User] = {}
+        loop = asyncio.get_running_loop()
+        # Shared result for contents the prefilter rules out
+        not_a_listing = loop.create_future()
+        not_a_listing.set_result({"category": "GENERAL", "item": None, "apartment": None})
+        # New messages of a backfill stay out of the session and are COPYed once
+        # their batch is extracted. A stream's size isn't known up front, so it
+        # switches to COPY once it has delivered more than the threshold
+        total = len(messages) if isinstance(messages, Sized) else None
+        read = 0
+        # The previous batch's messages, new authors and COPY list; its rows are
+        # written while the next batch waits on the LLM
+        prev_messages: Dict[str, Message] = {}
+        prev_users: List[User] = []
+        prev_copies: Optional[List[Message]] = None
+        prev_listings: Dict[Any, List[Dict[str, Any]]] = {}
         
-        for i in range(0, len(messages), batch_size):
-            batch = messages[i:i + batch_size]
-            
+        async for rows in _batched(messages, batch_size):
+            read += len(rows)
+            batch = _validate_rows(_messages_adapter, rows, "messages")
+            use_copy = (read if total is None else total) > _COPY_THRESHOLD
+
+            # The session isn't safe to share between tasks, so it is only used by
+            # one at a time: prepare the rows, then write the previous batch in a
+            # worker thread while this one waits on the LLM, then store the
+            # results in order. New rows join the session only once that write
+            # is done, so it can't pick them up half-prepared
+            pending = []
+            queued = set()
+            new_users: List[User] = []
+            new_messages: List[Message] = []
+            # Listing rows by model, inserted with Core when the batch is written
+            listings: Dict[Any, List[Dict[str, Any]]] = {ItemForSale: [], Apartment: []}
+
+            # Look up the batch's messages and new authors in one query each
+            # instead of one per message. The previous batch may not be written
+            # yet, so its messages are taken from memory
+            ids = [m.id for m in batch]
+            existing_messages = {mid: prev_messages[mid] for mid in ids if mid in prev_messages}
+            existing_messages.update(
+                (m.message_id, m)
+                for m in self.db.query(Message).filter(Message.message_id.in_(ids))
+            )
+            phones = {m.author_phone for m in batch if m.author_phone} - users_by_phone.keys()
+            if phones:
+                users_by_phone.update(
+                    (u.phone_number, u)
+                    for u in self.db.query(User).filter(User.phone_number.in_(phones))
+                )
+
             for message_data in batch:
-                try:
-                    message_stats = await self._process_single_message(message_data, group_id)
-                    stats["processed"] += message_stats["processed"]
-                    stats["items_extracted"] += message_stats["items_extracted"] 
-                    stats["apartments_extracted"] += message_stats["apartments_extracted"]
-                    
-                except Exception as e:
-                    print(f"Error processing message {message_data.get('id', 'unknown')}: {e}")
+                if message_data.id in queued:
+                    continue  # Repeated in this batch; already awaiting the LLM
+                prepared = await self._prepare_message(
+                    message_data, group, existing_messages, users_by_phone, new_users, new_messages,
+                )
+                if not prepared:
                     continue
-            
-            # Rate limiting between batches
-            await asyncio.sleep(settings.LLM_RATE_LIMIT_DELAY)
-        
+                message, user = prepared
+
+                # Skip empty messages
+                content = message_data.body.strip()
+                if not content or len(content) < 10:
+                    message.processed = True
+                    stats["processed"] += 1
+                    continue
+                if content not in extraction_tasks and not LISTING_HINTS.search(content):
+                    extraction_tasks[content] = not_a_listing
+                pending.append((message, user, content))
+                queued.add(message_data.id)
+
+            # Reposts of text already processed in an earlier run reuse its result
+            # instead of going back to the LLM
+            prior = self._prior_extractions(
+                message.content for message, _, content in pending if content not in extraction_tasks
+            )
+            for content, extraction in prior.items():
+                extraction_tasks[content] = loop.create_future()
+                extraction_tasks[content].set_result(extraction)
+
+            # Both are awaited to the end before either error is raised, so a
+            # failed extraction can't roll the session back under the writer
+            extractions, written = await asyncio.gather(
+                extract_batch([content for *_, content in pending]),
+                asyncio.to_thread(self._write_batch, prev_users, prev_copies, prev_listings),
+                return_exceptions=True,
+            )
+            for result in (written, extractions):
+                if isinstance(result, BaseException):
+                    raise result
+            self.db.add_all(new_users)
+            if not use_copy:
+                self.db.add_all(new_messages)
+            for (message, user, _), extraction in zip(pending, extractions):
+                message_stats = await self._store_extraction(extraction, message, user, listings)
+                stats["processed"] += message_stats["processed"]
+                stats["items_extracted"] += message_stats["items_extracted"] 
+                stats["apartments_extracted"] += message_stats["apartments_extracted"]
+
+            prev_messages = existing_messages
+            prev_users = new_users
+            prev_copies = new_messages if use_copy else None
+            prev_listings = listings
+
+        self._write_batch(prev_users, prev_copies, prev_listings)
         return stats
     
-    async def _process_single_message(self, message_data: Dict[str, Any], group_id: str) -> Dict[str, int]:
-        """Process a single message."""
-        stats = {"processed": 0, "items_extracted": 0, "apartments_extracted": 0}
-        
+    async def _prepare_message(
+        self,
+        message_data: MessageIn,
+        group: Group,
+        existing_messages: Dict[str, Message],
+        users_by_phone: Dict[str, User],
+        new_users: List[User],
+        new_messages: List[Message],
+    ) -> Optional[Tuple[Message, User]]:
+        """Prepare a validated message and return it with its author, or None
+        if it needs no further processing. `existing_messages` and `users_by_phone` are the
+        prefetched lookups; rows created here are added to them and to
+        `new_users`/`new_messages`, for the caller to add to the session."""
         # Check if message already exists
-        existing_message = self.db.query(Message).filter(
-            Message.message_id == message_data["id"]
-        ).first()
+        existing_message = existing_messages.get(message_data.id)
         
         if existing_message and existing_message.processed:
-            return stats  # Already processed
+            return None  # Already processed
         
         # Get or create user
-        user = await self._get_or_create_user_from_message(message_data)
+        user = await self._get_or_create_user_from_message(message_data, users_by_phone, new_users)
         if not user:
-            return stats
-        
-        # Get group
-        group = self.db.query(Group).filter(Group.id == group_id).first()
-        if not group:
-            return stats
+            return None
         
         # Create or update message
         if existing_message:
             message = existing_message
         else:
+            # Ids are assigned here rather than by a flush, so listings can
+            # reference the message before the batch is written
             message = Message(
-                message_id=message_data["id"],
+                id=uuid.uuid4(),
+                message_id=message_data.id,
                 user_id=user.id,
                 group_id=group.id,
-                content=message_data.get("body", ""),
-                timestamp=datetime.fromtimestamp(message_data["timestamp"]),
-                message_type=message_data.get("type", "text"),
-                reactions=message_data.get("reactions", []),
-                links=message_data.get("links", []),
-                has_media=message_data.get("hasMedia", False),
-                media_info=message_data.get("media"),
+                content=message_data.body,
+                timestamp=datetime.fromtimestamp(message_data.timestamp),
+                message_type=message_data.type,
+                reactions=message_data.reactions,
+                links=message_data.links,
+                has_media=message_data.has_media,
+                media_info=message_data.media,
                 processed=False
             )
-            self.db.add(message)
-            self.db.flush()  # Get ID
+            new_messages.append(message)
+            existing_messages[message.message_id] = message
         
-        # Skip empty messages
-        content = message_data.get("body", "").strip()
-        if not content or len(content) < 10:
-            message.processed = True
-            stats["processed"] = 1
-            return stats
-        
-        # Categorize and extract via LLM with structured outputs
-        try:
-            category = await self.llm_extractor.categorize_message(content)
-            if category == "ITEM_FOR_SALE":
-                item_data = await self.llm_extractor.extract_item_data(content)
-                if item_data:
-                    await self._create_item_for_sale(item_data, message, user)
-                    stats["items_extracted"] = 1
-            elif category == "APARTMENT_LISTING":
-                apartment_data = await self.llm_extractor.extract_housing_data(content)
-                if apartment_data:
-                    await self._create_apartment_listing(apartment_data, message, user)
-                    stats["apartments_extracted"] = 1
-            
-            # Store extracted entities
-            message.extracted_entities = {
-                "category": category,
-                "processed_at": datetime.utcnow().isoformat()
+        return message, user
+    
+    def _write_batch(
+        self,
+        users: List[User],
+        copies: Optional[List[Message]],
+        listings: Dict[Any, List[Dict[str, Any]]],
+    ) -> None:
+        """Write a batch's new users, messages and listings (a backfill COPYs its
+        messages, after their authors and before their listings). Rows are only
+        written once extraction has set their final state, so new messages need
+        no follow-up UPDATE."""
+        if copies:
+            if users:
+                self.db.flush(users)
+            self._bulk_copy_messages(copies)
+        self.db.flush()
+        # Listings are plain rows, so they skip the ORM and go in one executemany
+        # per table
+        for model, rows in listings.items():
+            if rows:
+                self.db.execute(model.__table__.insert(), rows)
+
+    def _bulk_copy_messages(self, messages: List[Message]) -> None:
+        """COPY messages that were never added to the session, in their final
+        state. Unset JSON columns stay SQL NULL and None ones become JSON null,
+        as when the ORM inserts them."""
+        rows = (
+            (
+                m.id, m.message_id, m.user_id, m.group_id, m.content, m.timestamp,
+                m.message_type,
+                JSON.NULL if m.reactions is None else m.reactions,
+                m.links, m.has_media,
+                JSON.NULL if m.media_info is None else m.media_info,
+                m.processed, m.extracted_entities, 1,
+            )
+            for m in messages
+        )
+        cursor = self.db.connection().connection.cursor()
+        copy_rows(cursor, Message.__table__, _MESSAGE_COPY_COLUMNS, rows)
+        cursor.close()
+
+    async def _extract_for_category(self, content: str, category: str) -> Dict[str, Any]:
+        """Extract listing details via LLM with structured outputs. Touches no DB
+        state, so calls for different messages can run concurrently."""
+        item_data = None
+        apartment_data = None
+        if category == "ITEM_FOR_SALE":
+            item_data = await self.llm_extractor.extract_item_data(content)
+        elif category == "APARTMENT_LISTING":
+            apartment_data = await self.llm_extractor.extract_housing_data(content)
+        return {"category": category, "item": item_data, "apartment": apartment_data}
+    
+    def _prior_extractions(self, bodies: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Find processed messages with exactly these bodies and rebuild their
+        extractions from the stored category and listing, keyed by stripped
+        content like `_extract_for_category` results. Listings whose extraction
+        left no row (failed or empty) are left out so they get retried."""
+        hashes = {hashlib.md5(body.encode()).hexdigest() for body in bodies}
+        if not hashes:
+            return {}
+        # Matched on md5(content), which idx_messages_content_md5 indexes; the
+        # content comparison guards against collisions. content_hash can't be
+        # used: ingest fills it with a normalized hash that ignores the prices
+        # and phone numbers an extraction depends on
+        rows = self.db.execute(
+            select(Message.id, Message.content, Message.extracted_entities).where(
+                func.md5(Message.content).in_(list(hashes)),
+                Message.processed,
+                Message.extracted_entities.isnot(None),
+            )
+        ).all()
+        # Listings are fetched by message id only for listing matches; joining
+        # them into the query above gets planned as scans of both tables
+        listing_ids = {
+            message_id for message_id, _, entities in rows
+            if (entities or {}).get("category") in ("ITEM_FOR_SALE", "APARTMENT_LISTING")
+        }
+        items: Dict[Any, ItemForSale] = {}
+        apartments: Dict[Any, Apartment] = {}
+        if listing_ids:
+            items = {
+                item.message_id: item
+                for item in self.db.scalars(select(ItemForSale).where(ItemForSale.message_id.in_(listing_ids)))
             }
-            message.processed = True
-            stats["processed"] = 1
-        except Exception as e:
-            print(f"Error processing message content: {e}")
+            apartments = {
+                apartment.message_id: apartment
+                for apartment in self.db.scalars(select(Apartment).where(Apartment.message_id.in_(listing_ids)))
+            }
+
+        found: Dict[str, Dict[str, Any]] = {}
+        for message_id, body, entities in rows:
+            category = (entities or {}).get("category")
+            content = body.strip()
+            if content in found:
+                continue
+            if category == "ITEM_FOR_SALE" and message_id in items:
+                found[content] = {
+                    "category": category, "item": _item_extraction(items[message_id]), "apartment": None,
+                }
+            elif category == "APARTMENT_LISTING" and message_id in apartments:
+                found[content] = {
+                    "category": category, "item": None,
+                    "apartment": _apartment_extraction(apartments[message_id]),
+                }
+            elif category == "GENERAL":
+                found[content] = {"category": category, "item": None, "apartment": None}
+        return found
+
+    async def _store_extraction(
+        self,
+        extraction: Any,
+        message: Message,
+        user: User,
+        listings: Dict[Any, List[Dict[str, Any]]],
+    ) -> Dict[str, int]:
+        """Persist an `_extract_for_category` result, or the exception it raised.
+        Listing rows are appended to `listings` by model."""
+        stats = {"processed": 1, "items_extracted": 0, "apartments_extracted": 0}
+        
+        if isinstance(extraction, BaseException):
+            logger.error("Error processing message content", exc_info=extraction)
             # Mark as processed even if extraction failed
             message.processed = True
-            stats["processed"] = 1
+            return stats
+        
+        if extraction["item"]:
+            if await self._create_item_for_sale(
+                extraction["item"], message, user, listings[ItemForSale]
+            ):
+                stats["items_extracted"] = 1
+        elif extraction["apartment"]:
+            if await self._create_apartment_listing(
+                extraction["apartment"], message, user, listings[Apartment]
+            ):
+                stats["apartments_extracted"] = 1
         
+        # Store extracted entities
+        message.extracted_entities = {
+            "category": extraction["category"],
+            "processed_at": datetime.utcnow().isoformat()
+        }
+        message.processed = True
         return stats
     
-    async def _get_or_create_user_from_message(self, message_data: Dict[str, Any]) -> Optional[User]:
-        """Get or create user from message data."""
-        phone = message_data.get("authorPhone", "").strip()
+    async def _get_or_create_user_from_message(
+        self, message_data: MessageIn, users_by_phone: Dict[str, User], new_users: List[User]
+    ) -> Optional[User]:
+        """Get or create user from message data. New users are appended to
+        `new_users` rather than added to the session."""
+        phone = message_data.author_phone
         if not phone:
             return None
         
         # Check if user exists
-        user = self.db.query(User).filter(User.phone_number == phone).first()
+        user = users_by_phone.get(phone)
         
         if not user:
             # Create new user
             user = User(
-                unique_id=f"user_{uuid.uuid4().hex[:12]}",
+                id=uuid.uuid4(),
+                unique_id=f"user_{secrets.token_hex(6)}",
                 phone_number=phone,
                 display_name="Unknown",  # Will be updated from member data
                 groups_joined=[],
                 first_seen_date=datetime.utcnow(),
                 last_active_date=datetime.utcnow()
             )
-            self.db.add(user)
-            self.db.flush()
+            new_users.append(user)
+            users_by_phone[phone] = user
         
         return user
     
-    async def _create_item_for_sale(self, item_data: Dict[str, Any], message: Message, user: User):
-        """Create ItemForSale from extracted data."""
+    async def _create_item_for_sale(
+        self, item_data: Dict[str, Any], message: Message, user: User, rows: List[Dict[str, Any]]
+    ) -> bool:
+        """Append an items_for_sale row built from extracted data to `rows`.
+        Returns False if there was nothing worth listing."""
         try:
-            contact_info: Dict[str, Any] = {}
-            if item_data.get("contact_phone"):
-                contact_info["phone"] = item_data["contact_phone"]
-            if item_data.get("contact_email"):
-                contact_info["email"] = item_data["contact_email"]
-            if not contact_info and (message.links or []):
-                contact_info["link"] = (message.links or [None])[0]
-
-            item = ItemForSale(
-                item_id=f"item_{uuid.uuid4().hex[:12]}",
-                message_id=message.id,
-                user_id=user.id,
-                title=item_data.get("title", ""),
-                description=item_data.get("description", ""),
-                price=item_data.get("price"),
-                category=item_data.get("category", "other"),
-                condition=item_data.get("condition"),
-                contact_info=contact_info,
-                location=item_data.get("location"),
-                availability_status="available",
-                posted_date=message.timestamp
-            )
-            self.db.add(item)
-        except Exception as e:
-            print(f"Error creating item for sale: {e}")
+            (
+                title, description, price, category, condition, location, phone, email,
+            ) = _get_item_fields({**_ITEM_DEFAULTS, **item_data})
+            if not title and price is None:
+                return False
+
+            rows.append({
+                "item_id": f"item_{secrets.token_hex(6)}",
+                "message_id": message.id,
+                "user_id": user.id,
+                "title": title,
+                "description": description,
+                "price": price,
+                "category": category,
+                "condition": condition,
+                "contact_info": _contact_info(phone, email, message.links),
+                "location": location,
+                "availability_status": "available",
+                "posted_date": message.timestamp,
+            })
+            return True
+        except Exception:
+            logger.exception("Error creating item for sale")
+            return False
     
-    async def _create_apartment_listing(self, apartment_data: Dict[str, Any], message: Message, user: User):
-        """Create Apartment from extracted data."""
+    async def _create_apartment_listing(
+        self, apartment_data: Dict[str, Any], message: Message, user: User, rows: List[Dict[str, Any]]
+    ) -> bool:
+        """Append an apartments row built from extracted data to `rows`. Returns
+        False if there was nothing worth listing."""
         try:
-            contact_info: Dict[str, Any] = {}
-            if apartment_data.get("contact_phone"):
-                contact_info["phone"] = apartment_data["contact_phone"]
-            if apartment_data.get("contact_email"):
-                contact_info["email"] = apartment_data["contact_email"]
-            if not contact_info and (message.links or []):
-                contact_info["link"] = (message.links or [None])[0]
-
-            apartment = Apartment(
-                listing_id=f"apt_{uuid.uuid4().hex[:12]}",
-                message_id=message.id,
-                user_id=user.id,
-                listing_type=apartment_data.get("listing_type", ""),
-                address=apartment_data.get("address"),
-                price_per_month=apartment_data.get("price"),
-                bedrooms=apartment_data.get("bedrooms"),
-                bathrooms=apartment_data.get("bathrooms"),
-                amenities=apartment_data.get("amenities", []),
-                lease_duration=apartment_data.get("lease_duration"),
-                contact_info=contact_info,
-                key_features=apartment_data.get("key_features", []),
-                utilities_included=apartment_data.get("utilities_included"),
-                furnished=apartment_data.get("furnished"),
-                pet_friendly=apartment_data.get("pet_friendly"),
-                availability_status="available",
-                posted_date=message.timestamp
-            )
-            
-            # Parse dates if provided
-            if apartment_data.get("available_from"):
-                try:
-                    apartment.available_from = datetime.fromisoformat(str(apartment_data["available_from"]))
-                except:
-                    pass
-                    
-            if apartment_data.get("available_until"):
-                try:
-                    apartment.available_until = datetime.fromisoformat(str(apartment_data["available_until"]))
-                except:
-                    pass
-            
-            self.db.add(apartment)
-        except Exception as e:
-            print(f"Error creating apartment listing: {e}")
\ No newline at end of file
+            (
+                listing_type, address, price, bedrooms, bathrooms, amenities, lease_duration,
+                key_features, utilities_included, furnished, pet_friendly, available_from,
+                available_until, phone, email,
+            ) = _get_apartment_fields({**_APARTMENT_DEFAULTS, **apartment_data})
+            if not listing_type and price is None:
+                return False
+
+            rows.append({
+                "listing_id": f"apt_{secrets.token_hex(6)}",
+                "message_id": message.id,
+                "user_id": user.id,
+                "listing_type": listing_type,
+                "address": address,
+                "price_per_month": price,
+                "bedrooms": bedrooms,
+                "bathrooms": bathrooms,
+                "amenities": amenities,
+                "lease_duration": lease_duration,
+                "contact_info": _contact_info(phone, email, message.links),
+                "key_features": key_features,
+                "utilities_included": utilities_included,
+                "furnished": furnished,
+                "pet_friendly": pet_friendly,
+                # Parse dates if provided
+                "available_from": _parse_iso(str(available_from)) if available_from else None,
+                "available_until": _parse_iso(str(available_until)) if available_until else None,
+                "availability_status": "available",
+                "posted_date": message.timestamp,
+            })
+            return True
+        except Exception:
+            logger.exception("Error creating apartment listing")
+            return False
\ No newline at end of file
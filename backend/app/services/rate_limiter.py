@@ -0,0 +1,37 @@
+import asyncio
+import time
+
+
+class RateLimiter:
+    """Requests- and tokens-per-minute budget for an API, as token buckets that
+    refill continuously. A limit of 0 disables that bucket."""
+
+    def __init__(self, rpm: int, tpm: int):
+        self.rpm = rpm
+        self.tpm = tpm
+        self._requests = float(rpm)
+        self._tokens = float(tpm)
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self._updated
+        self._updated = now
+        self._requests = min(self.rpm, self._requests + elapsed * self.rpm / 60)
+        self._tokens = min(self.tpm, self._tokens + elapsed * self.tpm / 60)
+
+    async def acquire(self, tokens: int = 0) -> None:
+        """Wait until one request using `tokens` tokens fits the budget."""
+        self._refill()
+        # Take the budget up front, going into debt if it's exhausted, and sleep
+        # until the debt is repaid. Callers are served in arrival order and no
+        # lock is held across the sleep
+        wait = 0.0
+        if self.rpm > 0:
+            self._requests -= 1
+            wait = max(wait, -self._requests * 60 / self.rpm)
+        if self.tpm > 0:
+            self._tokens -= tokens
+            wait = max(wait, -self._tokens * 60 / self.tpm)
+        if wait > 0:
+            await asyncio.sleep(wait)
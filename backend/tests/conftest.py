@@ -0,0 +1,42 @@
+import os
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.base import Base
+from app.db.search_index import ensure_postgres_full_text_search
+
+# The processor relies on Postgres-only features (ON CONFLICT, COPY, md5
+# indexes), so these tests run against a real, disposable database named by
+# TEST_DATABASE_URL (see "Running Tests" in the README); without it they skip
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+
+@pytest.fixture(scope="session")
+def engine():
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    engine = create_engine(TEST_DATABASE_URL)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def session_factory(engine):
+    """Fresh schema per test; returns a factory for sessions configured like
+    SessionLocal, so each simulated run can use its own session."""
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    ensure_postgres_full_text_search(engine)
+    sessions = []
+
+    def make_session():
+        session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+        sessions.append(session)
+        return session
+
+    yield make_session
+    for session in sessions:
+        session.close()
+    Base.metadata.drop_all(engine)
@@ -0,0 +1,157 @@
+import hashlib
+import io
+import random
+from datetime import datetime, timezone
+from typing import Any, Dict
+
+import pytest
+
+from app.services import chat_export_parser
+from app.services.chat_export_parser import _try_parse_datetime, compute_content_hash, parse_chat_export
+from app.services.chat_ingest import _read_export
+
+# Pure-function tests: no database needed. Expected ids, timestamps and hashes
+# are what the original strptime/lazy-regex parser produced for the same input;
+# message ids in particular must never change (see _make_message_id)
+
+SENDERS = ["~ Alice", "Bob Smith", "+1 (555) 010-2000", "~ Priya +91 98450 12345", "Chen"]
+BODIES = [
+    "Selling my desk for $40, pickup on campus",
+    "ok thanks",
+    "",
+    "Room available from June\nrent $900/month\n\nDM me",
+    "see https://example.com/listing?id=1 for photos",
+    "[photo omitted] is not a header",
+    "Line one\n[not a header either\nstill the same message?",
+    "A long message " + "x" * 120,
+    "colon: in the body: twice",
+]
+
+
+def _header(rng: random.Random) -> str:
+    day, month, minute = rng.randint(1, 28), rng.randint(1, 12), rng.randint(0, 59)
+    style = rng.randrange(4)
+    if style == 0:
+        # 12-hour clock, two-digit year, narrow no-break space before AM/PM
+        hour = rng.randint(1, 12)
+        return f"[{day}/{month}/{rng.randint(0, 99):02d}, {hour}:{minute:02d} {rng.choice(['AM', 'pm'])}]"
+    if style == 1:
+        return f"[{day:02d}/{month:02d}/{rng.randint(2015, 2025)}, {rng.randint(0, 23):02d}:{minute:02d}:{rng.randint(0, 59):02d}]"
+    if style == 2:
+        # Month-first: only valid with the fallback, since the day is above 12
+        return f"[{month}/{rng.randint(13, 28)}/{rng.randint(2015, 2025)}, {rng.randint(0, 23)}:{minute:02d}]"
+    return f"[{day}/{month}/{rng.randint(2015, 2025)}, {rng.randint(1, 12)}:{minute:02d} {rng.choice(['AM', 'PM'])}]"
+
+
+def _synthetic_export(count: int = 2000, seed: int = 7) -> str:
+    rng = random.Random(seed)
+    lines = ["[12/03/23, 9:15:02 AM] Housing Group: Messages are end-to-end encrypted.\n"]
+    for i in range(count):
+        lines.append(f"{_header(rng)} {rng.choice(SENDERS)}: {rng.choice(BODIES)} #{i}\n")
+    return "".join(lines)
+
+
+def _digest(parsed: Dict[str, Any]) -> str:
+    rows = (
+        f"{m['message_id']}|{m['sender_name']}|{m['sender_phone']}|{m['timestamp'].isoformat()}|{m['body']}"
+        for m in parsed["messages"]
+    )
+    return hashlib.sha256("\n".join(rows).encode("utf-8")).hexdigest()
+
+
+EXPORT = _synthetic_export()
+# (message count, digest) of the original parser's output for EXPORT
+BASELINE = (2001, "bcafca234ce8af7c736830697c0433d08860896b32c036912b41e54af4a1cadc")
+# The same, from an upload with CRLF line endings, kept as sent
+BASELINE_CRLF = (2001, "c506756edf7a5905d9dbcc8ee45963a078fe6bbb1db724dcec37089b6e15c174")
+SINCE = datetime(2020, 1, 1, tzinfo=timezone.utc)
+BASELINE_SINCE = (1099, "35539aab635eb7f3706e14300dc7d6c570bbf6ae5e1d88e96d30a462a65abbc1")
+
+
+def test_message_ids_match_baseline():
+    parsed = parse_chat_export(iter([
+        "[12/03/23, 9:15:02 AM] Housing Group: Welcome!\n",
+        "[3/25/2023, 14:05] ~ Priya +91 98450 12345: Room for rent\n",
+        "second line\n",
+        "[photo omitted]\n",
+    ]))
+
+    assert parsed["group_name"] == "Housing Group"
+    assert [(m["sender_name"], m["sender_phone"], m["timestamp"], m["body"], m["message_id"])
+            for m in parsed["messages"]] == [
+        ("Housing Group", None, datetime(2023, 3, 12, 9, 15, 2, tzinfo=timezone.utc), "Welcome!",
+         "07789e80de67d3cef239b1ec8ebfbfa88c4c993e4a5b6871087c1db4aaebd1eb"),
+        ("Priya +91 98450 12345", "+919845012345", datetime(2023, 3, 25, 14, 5, tzinfo=timezone.utc),
+         "Room for rent\nsecond line", "976ea0de8dec96c277965c94d0f07e1652a0ab1a925b3d40707a60881823026f"),
+    ]
+
+
+def test_synthetic_export_matches_baseline():
+    parsed = parse_chat_export(iter(EXPORT.splitlines(True)))
+    assert (len(parsed["messages"]), _digest(parsed)) == BASELINE
+
+
+def test_since_filter_matches_baseline():
+    parsed = parse_chat_export(iter(EXPORT.splitlines(True)), since=SINCE)
+    assert (len(parsed["messages"]), _digest(parsed)) == BASELINE_SINCE
+
+
+@pytest.mark.parametrize("piece_chars", [1, 100, 4096])
+def test_piece_size_does_not_change_result(monkeypatch, piece_chars):
+    monkeypatch.setattr(chat_export_parser, "_PIECE_CHARS", piece_chars)
+    parsed = parse_chat_export(iter(EXPORT.splitlines(True)))
+    assert (len(parsed["messages"]), _digest(parsed)) == BASELINE
+
+
+def test_worker_processes_match_single_process(monkeypatch):
+    monkeypatch.setattr(chat_export_parser, "_PARALLEL_MIN_CHARS", 0)
+    parsed = parse_chat_export(iter([EXPORT]), workers=3)
+    assert (len(parsed["messages"]), _digest(parsed)) == BASELINE
+
+
+def test_crlf_upload_keeps_baseline_ids():
+    # How the upload endpoint decodes the request body
+    upload = io.BytesIO(EXPORT.replace("\n", "\r\n").encode("utf-8"))
+    parsed = parse_chat_export(io.TextIOWrapper(upload, encoding="utf-8", errors="replace", newline=""))
+    assert (len(parsed["messages"]), _digest(parsed)) == BASELINE_CRLF
+
+
+def test_read_export_translates_newlines_like_text_mode(tmp_path):
+    path = tmp_path / "export.txt"
+    path.write_bytes(EXPORT.replace("\n", "\r\n").encode("utf-8") + b"tail\rend")
+    with open(path, encoding="utf-8") as f:
+        assert _read_export(str(path)) == f.read()
+
+    path.write_bytes(EXPORT.replace("\n", "\r\n").encode("utf-8"))
+    parsed = parse_chat_export(iter([_read_export(str(path))]))
+    assert (len(parsed["messages"]), _digest(parsed)) == BASELINE
+
+
+def test_read_export_of_empty_file(tmp_path):
+    path = tmp_path / "export.txt"
+    path.write_bytes(b"")
+    assert _read_export(str(path)) == ""
+
+
+@pytest.mark.parametrize("fields, expected", [
+    (("12", "03", "23", "12", "30", None, "AM"), datetime(2023, 3, 12, 0, 30, tzinfo=timezone.utc)),
+    (("12", "03", "23", "12", "30", None, "pm"), datetime(2023, 3, 12, 12, 30, tzinfo=timezone.utc)),
+    (("1", "2", "69", "23", "59", "59", None), datetime(1969, 2, 1, 23, 59, 59, tzinfo=timezone.utc)),
+    (("1", "2", "68", "0", "00", None, None), datetime(2068, 2, 1, 0, 0, tzinfo=timezone.utc)),
+    (("2", "29", "2024", "7", "05", None, None), datetime(2024, 2, 29, 7, 5, tzinfo=timezone.utc)),
+    (("12", "03", "2023", "13", "00", None, "PM"), None),
+    (("12", "03", "2023", "0", "10", None, "AM"), None),
+    (("31", "31", "2023", "10", "00", None, None), None),
+])
+def test_header_timestamps_match_strptime(fields, expected):
+    assert _try_parse_datetime(*fields) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("", "6e340b9cffb37a989ca544e6bb780a2c78901d3fb33738768511a30617afa01d"),
+    ("Selling my desk for $40!!", "b0ed1be31b6863a546340ac40c42d017515a06bafe7b76c479783c5f2df7b71d"),
+    ("SELLING my desk for $45", "b0ed1be31b6863a546340ac40c42d017515a06bafe7b76c479783c5f2df7b71d"),
+    ("see https://example.com/x", "aa9e9b5c907d50feb410f2a84e81ab72c5ae6724d57ccc53650f9361d33dc734"),
+])
+def test_content_hash_matches_baseline(text, expected):
+    assert compute_content_hash(text) == expected
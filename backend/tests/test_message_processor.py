@@ -0,0 +1,217 @@
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+import pytest
+from sqlalchemy import func, select
+
+from app.models.database import Apartment, ItemForSale, Message, User
+from app.services import message_processor
+from app.services.message_processor import MessageProcessor
+
+
+def _category(text: str) -> str:
+    lowered = text.lower()
+    if "sublet" in lowered or "rent" in lowered:
+        return "APARTMENT_LISTING"
+    if "selling" in lowered:
+        return "ITEM_FOR_SALE"
+    return "GENERAL"
+
+
+class FakeLLM:
+    """Stands in for LLMExtractor and counts the texts it is asked about."""
+
+    def __init__(self):
+        self.calls = Counter()
+
+    async def categorize_batch(self, messages: List[str]) -> List[str]:
+        self.calls["categorize"] += len(messages)
+        return [_category(m) for m in messages]
+
+    async def extract_item_data(self, text: str) -> Optional[Dict[str, Any]]:
+        self.calls["item"] += 1
+        if "lamp" in text:
+            return None  # Nothing worth listing
+        if "bike" in text:
+            raise RuntimeError("LLM unavailable")
+        return {"title": text[:30], "price": 40.0, "category": "furniture", "contact_phone": "555-0100"}
+
+    async def extract_housing_data(self, text: str) -> Optional[Dict[str, Any]]:
+        self.calls["apartment"] += 1
+        return {
+            "listing_type": "sublet", "price": 900.0, "amenities": ["wifi"],
+            "available_from": "2024-06-01", "contact_email": "host@example.com",
+        }
+
+
+DESK = "Selling my desk for $40, pickup on campus"
+SUBLET = "Room available for sublet from June, rent $900"
+GYM = "Is the apartment gym open today?"
+LAMP = "Selling a broken lamp, free to a good home"
+BIKE = "Selling my bike, message me for the price"
+
+
+def _message(mid: str, body: str, phone: str = "+1 111", ts: int = 0) -> Dict[str, Any]:
+    return {"id": mid, "body": body, "timestamp": 1700000000 + ts, "authorPhone": phone, "type": "chat"}
+
+
+def _scrape(messages: List[Dict[str, Any]], members: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+    return {
+        "groupInfo": {"id": "g1", "name": "Housing", "participantCount": 2, "categories": ["housing"]},
+        "members": members if members is not None else [{"phone": "+1 111", "name": "Alice"}],
+        "messages": messages,
+    }
+
+
+async def _run(session_factory, scrape: Dict[str, Any], llm: FakeLLM) -> Dict[str, Any]:
+    processor = MessageProcessor(session_factory())
+    processor.llm_extractor = llm
+    return await processor.process_scraped_data(scrape)
+
+
+@pytest.mark.asyncio
+async def test_stats_match_baseline(session_factory):
+    # Expected numbers are what the original one-message-at-a-time processor
+    # reported for this scrape
+    members = [
+        {"phone": "+1 111", "name": "Alice"},
+        {"phone": " +1 222 ", "name": "Bob"},
+        {"phone": "", "name": "Nobody"},
+        {"name": "No phone"},
+    ]
+    messages = [
+        _message("m1", DESK, ts=1),
+        _message("m2", SUBLET, "+1 222", ts=2),
+        _message("m3", "ok thanks", ts=3),
+        _message("m4", "anyone going to the game tonight?", "+1 222", ts=4),
+        _message("m5", DESK, ts=5),
+        _message("m6", "Selling chairs, no author", "", ts=6),
+        _message("m7", LAMP, "+1 222", ts=7),
+        _message("m8", BIKE, ts=8),
+        _message("m1", DESK, ts=1),
+        {"body": "no id or timestamp"},
+    ]
+    results = await _run(session_factory, _scrape(messages, members), FakeLLM())
+
+    assert results == {
+        "group_processed": True,
+        "users_created": 2,
+        "users_updated": 0,
+        "messages_processed": 7,
+        "items_extracted": 2,
+        "apartments_extracted": 1,
+        "errors": [],
+    }
+    db = session_factory()
+    assert db.scalar(select(func.count()).select_from(Message)) == 7
+    assert db.scalar(select(func.count()).select_from(Message).where(Message.processed)) == 7
+    assert db.scalar(select(func.count()).select_from(ItemForSale)) == 2
+    assert db.scalar(select(func.count()).select_from(Apartment)) == 1
+
+
+@pytest.mark.asyncio
+async def test_members_are_upserted(session_factory):
+    await _run(session_factory, _scrape([], [{"phone": "+1 111", "name": "Alice"}]), FakeLLM())
+
+    results = await _run(session_factory, _scrape([], [
+        {"phone": "+1 111", "name": "Alice B"},
+        {"phone": "+1 333", "name": "Cara"},
+        {"phone": "+1 333", "name": "Cara C"},
+    ]), FakeLLM())
+
+    # The repeated member counts as created once, then updated
+    assert (results["users_created"], results["users_updated"]) == (1, 2)
+    db = session_factory()
+    names = dict(db.execute(select(User.phone_number, User.display_name)).all())
+    assert names == {"+1 111": "Alice B", "+1 333": "Cara C"}
+
+
+@pytest.mark.asyncio
+async def test_repost_in_later_run_reuses_stored_listing(session_factory):
+    await _run(session_factory, _scrape([
+        _message("a1", DESK, ts=1), _message("a2", SUBLET, ts=2), _message("a3", GYM, ts=3),
+    ]), FakeLLM())
+
+    llm = FakeLLM()
+    results = await _run(session_factory, _scrape([
+        _message("b1", DESK, ts=11), _message("b2", SUBLET, ts=12), _message("b3", GYM, ts=13),
+    ]), llm)
+
+    assert llm.calls == {}
+    assert (results["items_extracted"], results["apartments_extracted"]) == (1, 1)
+    db = session_factory()
+    items = db.execute(
+        select(Message.message_id, ItemForSale.title, ItemForSale.price, ItemForSale.contact_info)
+        .join(ItemForSale, ItemForSale.message_id == Message.id)
+        .order_by(Message.message_id)
+    ).all()
+    assert [i.message_id for i in items] == ["a1", "b1"]
+    assert items[0][1:] == items[1][1:]
+    apartments = db.execute(
+        select(Message.message_id, Apartment.price_per_month, Apartment.amenities,
+               Apartment.available_from, Apartment.contact_info)
+        .join(Apartment, Apartment.message_id == Message.id)
+        .order_by(Message.message_id)
+    ).all()
+    assert [a.message_id for a in apartments] == ["a2", "b2"]
+    assert apartments[0][1:] == apartments[1][1:]
+    categories = dict(db.execute(
+        select(Message.message_id, Message.extracted_entities["category"].as_string())
+    ).all())
+    assert categories["b3"] == "GENERAL"
+
+
+@pytest.mark.asyncio
+async def test_failed_and_empty_extractions_are_retried(session_factory):
+    first = await _run(session_factory, _scrape([
+        _message("a1", LAMP, ts=1), _message("a2", BIKE, ts=2),
+    ]), FakeLLM())
+    assert (first["messages_processed"], first["items_extracted"]) == (2, 0)
+
+    llm = FakeLLM()
+    await _run(session_factory, _scrape([
+        _message("b1", LAMP, ts=11), _message("b2", BIKE, ts=12),
+    ]), llm)
+
+    assert llm.calls == {"categorize": 2, "item": 2}
+
+
+async def _stream(messages: List[Dict[str, Any]]):
+    for message in messages:
+        yield message
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("as_stream", [False, True])
+async def test_large_scrape_is_copied_with_listings(session_factory, monkeypatch, as_stream):
+    copied = []
+    bulk_copy = MessageProcessor._bulk_copy_messages
+
+    def spy(self, messages):
+        copied.extend(m.message_id for m in messages)
+        return bulk_copy(self, messages)
+
+    monkeypatch.setattr(MessageProcessor, "_bulk_copy_messages", spy)
+    count = message_processor._COPY_THRESHOLD + 100
+    # Every fifth message is a distinct listing, so each gets its own row
+    messages = [
+        _message(f"m{i}", f"{DESK} #{i}" if i % 5 == 0 else f"just chatting, message {i}", ts=i)
+        for i in range(count)
+    ]
+    results = await _run(session_factory, _scrape(_stream(messages) if as_stream else messages), FakeLLM())
+
+    assert results["errors"] == []
+    assert results["messages_processed"] == count
+    assert results["items_extracted"] == count // 5
+    assert len(copied) > 0
+    if not as_stream:
+        # A list's size is known up front, so every message goes through COPY
+        assert len(copied) == count
+    db = session_factory()
+    assert db.scalar(select(func.count()).select_from(Message).where(Message.processed)) == count
+    # Every listing points at a stored message, including the COPYed ones
+    linked = db.scalars(
+        select(Message.message_id).join(ItemForSale, ItemForSale.message_id == Message.id)
+    ).all()
+    assert sorted(linked) == sorted(f"m{i}" for i in range(0, count, 5))
+    assert set(linked) & set(copied)
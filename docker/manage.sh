@@ -29,8 +29,8 @@ print_red() {
 start_services() {
     print_green "🚀 Starting University Chat Scraper services..."
     
-    print_yellow "Starting database services (PostgreSQL, Redis, Elasticsearch)..."
-    docker-compose up -d postgres redis elasticsearch
+    print_yellow "Starting database services (PostgreSQL, PgBouncer, Redis, Elasticsearch)..."
+    docker-compose up -d postgres pgbouncer redis elasticsearch
     
     print_yellow "Waiting for databases to be ready..."
     sleep 10